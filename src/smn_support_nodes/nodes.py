@@ -7,6 +7,7 @@ from .nodes_input.node_input_float import SsnInputFloat
 from .nodes_input.node_input_color import SsnInputColor  
 from .nodes_input.node_input_font import SsnInputFont
 from .nodes_input.node_input_json import SsnInputJSON
+from .nodes_input.node_input_json_file import SsnInputJSONFile
 
 # Convert Imports
 from .nodes_convert.node_convert_int import SsnConvInt
@@ -15,6 +16,7 @@ from .nodes_convert.node_convert_string import SsnConvString
 
 # Output Imports
 from .nodes_output.node_output_webm import SsnOutputWebM
+from .nodes_output.node_output_webmstatus import SsnOutputWebMStatus
 
 # Image Draw Imports
 from .nodes_draw.node_draw_text import SsnDrawText 
@@ -23,6 +25,7 @@ from .nodes_draw.node_draw_text import SsnDrawText
 from .nodes_json.node_json_getkeyvalue import SsnJSONGetKeyValue
 from .nodes_json.node_json_getindexvalue import SsnJsonGetIndexValue
 from .nodes_json.node_json_getvalueas import SsnJsonValueAs
+from .nodes_json.node_json_query import SsnJsonQuery
 
 # Prep Imports
 from .nodes_prep.node_prep_trimscale import SsnPrepTrimScale
@@ -30,6 +33,7 @@ from .nodes_prep.node_prep_crop import SsnPrepCrop
 from .nodes_prep.node_prep_flattenalpha import SsnPrepFlattenAlpha
 from .nodes_prep.node_prep_batchappend import SsnPrepAppendBatch
 from .nodes_prep.node_prep_batchreverse import SsnPrepReverseBatch
+from .nodes_prep.node_prep_batchselect import SsnPrepSelectBatch
 
 
 # ----- Node Class Mappings ----- #
@@ -43,24 +47,28 @@ NODE_CLASS_MAPPINGS = {
     "SsnInputColor": SsnInputColor,
     "SsnInputFont": SsnInputFont,
     "SsnInputJSON": SsnInputJSON,
+    "SsnInputJSONFile": SsnInputJSONFile,
 
     "SsnConvInt": SsnConvInt,
     "SsnConvFloat": SsnConvFloat,
     "SsnConvString": SsnConvString,
 
     "SsnOutputWebM": SsnOutputWebM,
+    "SsnOutputWebMStatus": SsnOutputWebMStatus,
 
     "SsnDrawText": SsnDrawText,
 
     "SsnJSONGetKeyValue": SsnJSONGetKeyValue,
     "SsnJSONGetIndexValue": SsnJsonGetIndexValue,
     "SsnJSONGetValueAs": SsnJsonValueAs,
+    "SsnJSONQuery": SsnJsonQuery,
 
     "SsnPrepTrimScale": SsnPrepTrimScale,
     "SsnPrepCrop": SsnPrepCrop,
     "SsnPrepFlattenAlpha": SsnPrepFlattenAlpha,
     "SsnPrepAppendBatch": SsnPrepAppendBatch,
     "SsnPrepReverseBatch": SsnPrepReverseBatch,
+    "SsnPrepSelectBatch": SsnPrepSelectBatch,
 }
 
 # ----- Node Display Name Mappings ----- #
@@ -73,23 +81,27 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "SsnInputColor": "[SSN] Input Color",
     "SsnInputFont": "[SSN] Input Font",
     "SsnInputJSON": "[SSN] Input JSON",
+    "SsnInputJSONFile": "[SSN] Input JSON File",
 
     "SsnConvInt": "[SSN] Convert Int To Others",
     "SsnConvFloat": "[SSN] Convert Float To Others",
     "SsnConvString": "[SSN] Convert String To Others",
 
     "SsnOutputWebM": "[SSN] Output WebM",
+    "SsnOutputWebMStatus": "[SSN] Output WebM Job Status",
 
     "SsnDrawText": "[SSN] Draw Text",
 
     "SsnJSONGetKeyValue": "[SSN] JSON Get Key Value",
     "SsnJSONGetIndexValue": "[SSN] JSON Get Index Value",
     "SsnJSONGetValueAs": "[SSN] JSON Get Value As",
+    "SsnJSONQuery": "[SSN] JSON Query",
 
     "SsnPrepTrimScale": "[SSN] Prep Trim Scale",
     "SsnPrepCrop": "[SSN] Prep Crop",
     "SsnPrepFlattenAlpha": "[SSN] Prep Flatten Alpha",
     "SsnPrepAppendBatch": "[SSN] Prep Append Batch",
     "SsnPrepReverseBatch": "[SSN] Prep Reverse Batch",
+    "SsnPrepSelectBatch": "[SSN] Prep Select Batch",
 
 }
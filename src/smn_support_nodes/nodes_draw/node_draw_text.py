@@ -1,18 +1,40 @@
 import numpy as np
 import torch  # type: ignore
 from inspect import cleandoc
-from ..util_convert import (
-    convert_np_array_to_tensor,
-    convert_tensor_to_np_array,
-    convert_3ch_np_to_4ch_np,
-)
-from PIL import Image, ImageDraw, ImageFont  # type: ignore
+from ..util_convert import convert_3ch_batch_to_4ch_tbatch
+from ..util_animation import evaluate_track
+from ..util_font_cache import FONT_DIR, format_font_cache_stats, get_font
+from ..util_font_catalog import get_font_catalog
+from ..util_glyph_atlas import get_glyph_atlas
+from ..util_text_layout import fit_text_size, layout_text
+from PIL import Image, ImageDraw  # type: ignore
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 class SsnDrawText:
     """
     A node for drawing text onto an image.
+    The text is rasterized once and composited onto every frame of the batch in one tensor operation,
+    on the input's device.
+    Line breaks start new lines. With text_max_width > 0 lines wrap at spaces to that width, and
+    text_line_spacing scales the distance between lines; lines align within the block by
+    text_align_horizontal. text_auto_fit picks the largest size up to text_size that fits within
+    text_max_width × text_max_height (0 leaves a side unbounded).
+    With text_per_frame, text_content holds one text per frame: a JSON array, or one line per
+    frame (a list of strings is accepted as is). The texts repeat when there are fewer than
+    frames. They are assembled from a cached atlas of the font's glyphs, so frame counters,
+    timecodes and subtitles cost little more than copying the glyphs.
+    text_pos_x_animation / text_pos_y_animation move the text per frame, overriding text_pos_x /
+    text_pos_y: "frame:value" keyframes ("0:0, 48:200"), interpolated linearly, or an expression of
+    the frame index f, the batch size n, t (0 to 1 over the batch) and the static position pos
+    ("pos + 4 * f"). The text is laid out and rasterized once and placed on every frame in one
+    gather/scatter.
     """
+
+    # Threads assembling per-frame texts
+    RENDER_WORKERS = os.cpu_count() or 1
+
     def __init__(self):
         pass
 
@@ -47,6 +69,29 @@ class SsnDrawText:
                     "default": False,
                 }),
             },
+            "optional": {
+                "text_per_frame": ("BOOLEAN", {
+                    "default": False,
+                }),
+                "text_pos_x_animation": ("STRING", {
+                    "default": "",
+                }),
+                "text_pos_y_animation": ("STRING", {
+                    "default": "",
+                }),
+                "text_max_width": ("INT", {
+                    "default": 0, "min": 0,
+                }),
+                "text_max_height": ("INT", {
+                    "default": 0, "min": 0,
+                }),
+                "text_line_spacing": ("FLOAT", {
+                    "default": 1.0, "min": 0.1, "max": 10.0, "step": 0.05,
+                }),
+                "text_auto_fit": ("BOOLEAN", {
+                    "default": False,
+                }),
+            },
         }
 
     RETURN_TYPES = ("IMAGE", )
@@ -56,22 +101,39 @@ class SsnDrawText:
 
     def execute(
         self, image, text_content, text_pos_x, text_pos_y, text_size, text_color,
-        font_name, text_align_horizontal, text_align_vertical, debug
+        font_name, text_align_horizontal, text_align_vertical, debug, text_per_frame=False,
+        text_pos_x_animation="", text_pos_y_animation="", text_max_width=0, text_max_height=0,
+        text_line_spacing=1.0, text_auto_fit=False
     ):
         try:
             batch_size, height, width, channels = image.shape
         except Exception as e:
             raise ValueError(f"Error getting image shape: {e}. Input image: {image}")
 
-        # Prepare result tensor, matching input shape (force 4 channels)
-        result = torch.zeros((batch_size, height, width, 4), dtype=image.dtype)
+        # Result keeps the input's device and dtype (force 4 channels)
+        try:
+            result, batch_size, height, width, channels = convert_3ch_batch_to_4ch_tbatch(image)
+        except Exception as e:
+            raise ValueError(f"Error preparing RGBA batch: {e}")
+        if result is image:
+            result = image.clone()
 
-        # Font path setup
-        font_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "../resources/fonts"))
-        font_true_path = os.path.join(font_dir, font_name) if font_name != "default" else None
-        if font_name != "default" and not os.path.exists(font_true_path):
+        # Font path setup; fonts outside the catalog (not .ttf) are only checked for existence
+        font_true_path = os.path.join(FONT_DIR, font_name) if font_name != "default" else None
+        catalog = get_font_catalog()
+        if font_name != "default" and catalog.get(font_name) is None and not os.path.exists(font_true_path):
             raise ValueError(f"Font file not found: {font_true_path}")
 
+        per_frame = text_per_frame or isinstance(text_content, (list, tuple))
+        texts = self._frame_texts(text_content, batch_size) if per_frame else [text_content]
+
+        # Reject characters the font has no glyph for, from the catalog's cmap index
+        # without loading the font
+        if font_name != "default":
+            missing = catalog.missing_glyphs(font_name, "".join(set(texts)))
+            if missing:
+                raise ValueError(f"Font {font_name} has no glyph for: {' '.join(repr(c) for c in missing)}")
+
         # Convert text color
         try:
             if isinstance(text_color, tuple) and len(text_color) == 3:
@@ -81,61 +143,239 @@ class SsnDrawText:
         except Exception as e:
             raise ValueError(f"Error parsing text color: {e}")
 
-        for b in range(batch_size):
-            # Convert tensor to numpy
-            img_np = convert_tensor_to_np_array(image[b])
+        # Load font (shared, process-wide cache)
+        try:
+            font = get_font(font_true_path, text_size)
+        except Exception as e:
+            raise ValueError(f"Error loading font: {e}")
+        if debug:
+            print(f"[SsnDrawText] Font cache: {format_font_cache_stats()}")
 
-            # Ensure 4-channel (RGBA) using helper
-            img_np = convert_3ch_np_to_4ch_np(img_np)
+        ink = torch.tensor(text_color_rgb, device=result.device, dtype=result.dtype) / 255.0
 
-            # Convert to PIL Image
-            pil_image = Image.fromarray(img_np, mode='RGBA')
-            draw = ImageDraw.Draw(pil_image)
+        # Per-frame positions, from keyframes or expressions of the frame index
+        animated = bool(text_pos_x_animation.strip() or text_pos_y_animation.strip())
+        pos_xs = evaluate_track(text_pos_x_animation, batch_size, text_pos_x)
+        pos_ys = evaluate_track(text_pos_y_animation, batch_size, text_pos_y)
 
-            # Load font
-            try:
-                font = (
-                    ImageFont.truetype(font_true_path, text_size)
-                    if font_true_path else ImageFont.load_default()
+        # Lay out each distinct text once: wrapped, spaced and aligned line by line, at text_size or,
+        # with auto-fit, the largest size up to it that fits the box
+        def layout(text):
+            size = text_size
+            if text_auto_fit:
+                size = fit_text_size(
+                    font_true_path, text, text_max_width, text_max_height, text_size, 1, text_line_spacing
                 )
-            except Exception as e:
-                raise ValueError(f"Error loading font: {e}")
+            return layout_text(
+                font_true_path, size, text, text_max_width, text_line_spacing, text_align_horizontal
+            )
 
-            # Calculate text size
-            try:
-                text_width = draw.textlength(text_content, font=font)
-                bbox = draw.textbbox((0, 0), text_content, font=font)
-                text_height = bbox[3] - bbox[1]
-            except Exception as e:
-                raise ValueError(f"Error calculating text size: {e}")
+        try:
+            blocks = {text: layout(text) for text in set(texts)}
+        except Exception as e:
+            raise ValueError(f"Error calculating text size: {e}")
 
-            # Align position
-            pos_x = (
-                text_pos_x - text_width // 2 if text_align_horizontal == "center"
-                else text_pos_x - text_width if text_align_horizontal == "right"
-                else text_pos_x
-            )
-            pos_y = (
-                text_pos_y - text_height // 2 if text_align_vertical == "center"
-                else text_pos_y - text_height if text_align_vertical == "bottom"
-                else text_pos_y
+        if per_frame:
+            self._draw_per_frame(
+                result, texts, blocks, font_true_path, pos_xs, pos_ys,
+                text_align_horizontal, text_align_vertical, ink
             )
+            return (result, )
+
+        # The text is the same on every frame: rasterize its coverage once
+        block = blocks[text_content]
+        try:
+            font = get_font(font_true_path, block.size)
+        except Exception as e:
+            raise ValueError(f"Error loading font: {e}")
 
-            # Draw text with full alpha
+        if animated:
+            # Rasterize the text once into a sprite the size of its box, then place it on every
+            # frame at that frame's aligned position, snapped to whole pixels
+            if block.ink_box is None:
+                return (result, )
+            x0, y0, x1, y1 = block.ink_box
+            sprite = Image.new("L", (x1 - x0, y1 - y0), 0)
+            draw = ImageDraw.Draw(sprite)
             try:
-                draw.text((pos_x, pos_y), text_content, font=font, fill=text_color_rgb + (255,))
+                for line in block.lines:
+                    draw.text((line.x - x0, line.y - y0), line.text, font=font, fill=255)
             except Exception as e:
                 raise ValueError(f"Error drawing text on image: {e}")
+            xs, ys = self._align(
+                pos_xs, pos_ys, block.width, block.height, text_align_horizontal, text_align_vertical
+            )
+            self._composite_sprites(
+                result, [np.asarray(sprite)], np.zeros(batch_size, dtype=np.int64),
+                self._snap(xs) + x0, self._snap(ys) + y0, ink
+            )
+            return (result, )
 
-            # Convert back to numpy, ensure RGBA
-            out_np = np.array(pil_image.convert('RGBA'))
-            out_np = convert_3ch_np_to_4ch_np(out_np)
+        pos_x, pos_y = self._align(
+            text_pos_x, text_pos_y, block.width, block.height, text_align_horizontal, text_align_vertical
+        )
 
-            # Convert to tensor and assign
-            try:
-                result[b] = convert_np_array_to_tensor(out_np, image.dtype)
-            except Exception as e:
-                raise ValueError(f"Error converting numpy array to tensor for batch {b}: {e}")
+        # Draw text coverage, line by line
+        mask_image = Image.new("L", (width, height), 0)
+        draw = ImageDraw.Draw(mask_image)
+        try:
+            for line in block.lines:
+                draw.text((pos_x + line.x, pos_y + line.y), line.text, font=font, fill=255)
+        except Exception as e:
+            raise ValueError(f"Error drawing text on image: {e}")
+
+        sprite_box = mask_image.getbbox()
+        if sprite_box is None:
+            return (result, )
+
+        # Composite the sprite onto every frame at once
+        x0, y0, x1, y1 = sprite_box
+        coverage = torch.from_numpy(np.asarray(mask_image.crop(sprite_box)).copy())
+        self._composite(result[:, y0:y1, x0:x1], coverage, ink)
 
         return (result, )
 
+    @staticmethod
+    def _frame_texts(text_content, batch_size):
+        """
+        Split text_content into one text per frame, repeating the texts to fill the batch.
+        """
+        if isinstance(text_content, (list, tuple)):
+            texts = list(text_content)
+        elif text_content.lstrip().startswith("["):
+            try:
+                texts = json.loads(text_content)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Error parsing per-frame texts as a JSON array: {e}")
+            if not isinstance(texts, list):
+                raise ValueError("Per-frame texts must be a JSON array")
+        else:
+            texts = text_content.splitlines()
+
+        if not texts:
+            texts = [""]
+        # Non-string JSON values are drawn as their JSON text
+        texts = [text if isinstance(text, str) else "" if text is None else json.dumps(text) for text in texts]
+        texts = [text.replace("\r\n", "\n").replace("\r", "\n") for text in texts]
+        return [texts[b % len(texts)] for b in range(batch_size)]
+
+    @staticmethod
+    def _align(text_pos_x, text_pos_y, text_width, text_height, text_align_horizontal, text_align_vertical):
+        pos_x = (
+            text_pos_x - text_width // 2 if text_align_horizontal == "center"
+            else text_pos_x - text_width if text_align_horizontal == "right"
+            else text_pos_x
+        )
+        pos_y = (
+            text_pos_y - text_height // 2 if text_align_vertical == "center"
+            else text_pos_y - text_height if text_align_vertical == "bottom"
+            else text_pos_y
+        )
+        return pos_x, pos_y
+
+    @staticmethod
+    def _snap(positions):
+        """
+        Round positions to whole pixels, halves down, which is where PIL puts text drawn at a
+        fractional position whenever that is a plain translation.
+        """
+        return np.ceil(np.asarray(positions, dtype=np.float64) - 0.5).astype(np.int64)
+
+    def _draw_per_frame(
+        self, result, texts, blocks, font_path, pos_xs, pos_ys,
+        text_align_horizontal, text_align_vertical, ink
+    ):
+        # Assemble each distinct text once, line by line from the glyph atlas of its size, into a
+        # sprite the size of its covered box; numpy releases the GIL while blitting
+        inked = [text for text, block in blocks.items() if block.ink_box is not None]
+        if not inked:
+            return
+        workers = max(1, min(self.RENDER_WORKERS, len(inked)))
+        chunk = -(-len(inked) // workers)
+
+        def render(start):
+            sprites = []
+            for text in inked[start:start + chunk]:
+                block = blocks[text]
+                atlas = get_glyph_atlas(font_path, block.size)
+                x0, y0, x1, y1 = block.ink_box
+                sprite = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+                for line in block.lines:
+                    if line.text:
+                        atlas.blit(atlas.layout(line.text), sprite, line.x - x0, line.y - y0)
+                sprites.append(sprite)
+            return sprites
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                sprites = [sprite for part in pool.map(render, range(0, len(inked), chunk)) for sprite in part]
+        except Exception as e:
+            raise ValueError(f"Error drawing per-frame text: {e}")
+
+        # Each frame's sprite and where it goes: the aligned origin, snapped to whole pixels, plus
+        # the sprite's offset from it
+        sprite_index = {text: k for k, text in enumerate(inked)}
+        frame_sprites = np.full(len(texts), -1, dtype=np.int64)
+        xs = np.zeros(len(texts))
+        ys = np.zeros(len(texts))
+        for b, text in enumerate(texts):
+            block = blocks[text]
+            if block.ink_box is None:
+                continue
+            pos_x, pos_y = self._align(
+                pos_xs[b], pos_ys[b], block.width, block.height, text_align_horizontal, text_align_vertical
+            )
+            frame_sprites[b] = sprite_index[text]
+            xs[b] = pos_x + block.ink_box[0]
+            ys[b] = pos_y + block.ink_box[1]
+
+        self._composite_sprites(result, sprites, frame_sprites, self._snap(xs), self._snap(ys), ink)
+
+    def _composite_sprites(self, result, sprites, frame_sprites, xs, ys, ink):
+        """
+        Composite uint8 sprites onto a B×H×W×4 batch in place: frame b gets sprites[frame_sprites[b]]
+        (none when -1) with its top-left corner at (xs[b], ys[b]), clipped to the frame. The covered
+        pixels of the whole batch are gathered, composited and scattered back in one operation each.
+        """
+        _, height, width, _ = result.shape
+        frames_of = {}
+        for b, k in enumerate(frame_sprites.tolist()):
+            if k >= 0:
+                frames_of.setdefault(k, []).append(b)
+
+        # Flat (frame, row, column, coverage) lists of every covered pixel
+        bs, rows, cols, values = [], [], [], []
+        for k, frames in frames_of.items():
+            sprite_rows, sprite_cols = np.nonzero(sprites[k])
+            if not len(sprite_rows):
+                continue
+            frames = np.asarray(frames, dtype=np.int64)
+            r = ys[frames, None] + sprite_rows
+            c = xs[frames, None] + sprite_cols
+            inside = (r >= 0) & (r < height) & (c >= 0) & (c < width)
+            bs.append(np.broadcast_to(frames[:, None], r.shape)[inside])
+            rows.append(r[inside])
+            cols.append(c[inside])
+            values.append(np.broadcast_to(sprites[k][sprite_rows, sprite_cols], r.shape)[inside])
+        if not bs:
+            return
+
+        index = tuple(
+            torch.from_numpy(np.concatenate(part)).to(result.device) for part in (bs, rows, cols)
+        )
+        pixels = result[index]
+        self._composite(pixels, torch.from_numpy(np.concatenate(values)), ink)
+        result[index] = pixels
+
+    @staticmethod
+    def _composite(region, coverage, ink):
+        """
+        Composite uint8 coverage onto RGBA pixels in place, the way PIL draws on RGBA: each channel
+        moves toward the ink by the coverage, and fully transparent pixels take the ink's color.
+        The coverage has the region's shape without the channels, or broadcasts to it.
+        """
+        coverage = coverage.to(device=region.device, dtype=region.dtype).div_(255).unsqueeze(-1)
+        transparent = (region[..., 3:4] * 255 < 1) & (coverage > 0)
+        base_rgb = torch.where(transparent, ink, region[..., :3])
+        region[..., :3] = torch.lerp(base_rgb, ink.expand_as(base_rgb), coverage)
+        region[..., 3:4].lerp_(torch.ones_like(coverage), coverage)
@@ -1,9 +1,10 @@
 from inspect import cleandoc
-import os
+from ..util_font_catalog import get_font_catalog
 
 class SsnInputFont:
     """
     A node for selecting a font from the available fonts in the fonts directory.
+    The list comes from the font catalog, which only rescans the directory when it changes.
     """
     def __init__(self):
         pass
@@ -13,11 +14,7 @@ class SsnInputFont:
         """
         Get all .ttf files in the fonts directory, sorted by name.
         """
-        font_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "../resources/fonts"))
-
-        if not os.path.exists(font_dir):
-            return []
-        return sorted([f for f in os.listdir(font_dir) if f.endswith(".ttf")])
+        return get_font_catalog().font_names()
 
     @classmethod
     def INPUT_TYPES(cls):
@@ -0,0 +1,110 @@
+from inspect import cleandoc
+import os
+import folder_paths
+from ..util_json_file import get_json_file
+
+class SsnInputJSONFile:
+    """
+    A node that reads one record from a JSON Lines (.jsonl/.ndjson) or JSON array/object file and
+    outputs it as a JSON-formatted string, so large batch manifests stay on disk instead of inside
+    the workflow.
+
+    The file is memory-mapped and indexed once by the byte span of every record (the index is saved
+    next to the file as a hidden .index.npz and rebuilt only when the file changes), so a lookup
+    decodes just the one record, however big the file.
+
+    Class methods
+    -------------
+    INPUT_TYPES (dict):
+        Defines the input fields for this node:
+          - "file_path": the file, absolute or relative to the ComfyUI input directory.
+          - "index": the record's position (negative counts from the end).
+          - "key" (optional): look the record up by key instead of position.
+          - "key_field" (optional): the field of each record holding its key. For a JSON object
+            file, keys are the object's own keys and this is not needed.
+    IS_CHANGED (str):
+        The file's size and mtime, so editing the file re-runs the node.
+
+    Attributes
+    ----------
+    RETURN_TYPES (`tuple`):
+        The types of the output tuple: STRING, INT.
+    RETURN_NAMES (`tuple`):
+        The names of the outputs ("value", "count").
+    FUNCTION (`str`):
+        The name of the entry-point method. This node uses "execute".
+    CATEGORY (`str`):
+        The category under which this node appears in the UI ("Input").
+    execute(file_path, index, key, key_field) -> tuple:
+        Returns the record's JSON text and the number of records in the file. A missing index or key
+        returns an empty string.
+    """
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "file_path": (
+                    "STRING",
+                    {
+                        "multiline": False,
+                        "default": ""
+                    }
+                ),
+                "index": (
+                    "INT",
+                    {
+                        "default": 0,
+                        "min": -2147483648,
+                        "max": 2147483647,
+                        "step": 1,
+                        "display": "number"
+                    }
+                )
+            },
+            "optional": {
+                "key": ("STRING", {"multiline": False, "default": ""}),
+                "key_field": ("STRING", {"multiline": False, "default": ""}),
+            }
+        }
+
+    @classmethod
+    def resolve_path(cls, file_path):
+        path = os.path.expanduser(file_path.strip())
+        if not os.path.isabs(path):
+            path = os.path.join(folder_paths.get_input_directory(), path)
+        return path
+
+    @classmethod
+    def IS_CHANGED(cls, file_path, index, key="", key_field=""):
+        try:
+            stat = os.stat(cls.resolve_path(file_path))
+        except OSError:
+            return ""
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    RETURN_TYPES = ("STRING", "INT",)
+    RETURN_NAMES = ("value", "count",)
+    DESCRIPTION = cleandoc(__doc__)
+    FUNCTION = "execute"
+    CATEGORY = "Input"
+
+    def __init__(self):
+        pass
+
+    def execute(self, file_path, index, key="", key_field=""):
+        path = self.resolve_path(file_path)
+        if not os.path.isfile(path):
+            raise ValueError(f"JSON file not found: {path}")
+        records = get_json_file(path, key_field.strip())
+
+        if key:
+            row = records.find(key)
+            if row is None:
+                print(f"Key '{key}' not found in {path}.")
+                return ("", len(records))
+        else:
+            row = index
+            if not -len(records) <= row < len(records):
+                print(f"Index {index} out of range, {path} has {len(records)} records.")
+                return ("", len(records))
+        return (records.record(row), len(records))
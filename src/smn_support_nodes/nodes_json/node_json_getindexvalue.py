@@ -1,5 +1,6 @@
 from inspect import cleandoc
 import json
+from ..util_json_cache import parse_json
 
 class SsnJsonGetIndexValue:
     """
@@ -24,7 +25,8 @@ class SsnJsonGetIndexValue:
     CATEGORY (`str`):
         The category under which this node appears in the UI ("JSON").
     execute(json_string, index) -> tuple:
-        Parses the JSON string as an array and returns the element at the given index
+        Parses the JSON string as an array (through the shared parse cache, so getters fed the
+        same document parse it once) and returns the element at the given index
         as a JSON-formatted string. If parsing fails, the input is not an array, or the
         index is out of bounds, returns an empty string.
     """
@@ -63,7 +65,7 @@ class SsnJsonGetIndexValue:
 
     def execute(self, json_string, index):
         try:
-            data = json.loads(json_string)
+            data = parse_json(json_string)
             if isinstance(data, list) and 0 <= index < len(data):
                 value = data[index]
                 return (json.dumps(value),)
@@ -1,5 +1,6 @@
 from inspect import cleandoc
 import json
+from ..util_json_cache import parse_json
 
 class SsnJSONGetKeyValue:
     """
@@ -21,7 +22,8 @@ class SsnJSONGetKeyValue:
     CATEGORY (`str`):
         The category under which this node appears in the UI ("JSON").
     execute(json_string, key) -> tuple:
-        Parses the JSON from the pin and returns the value for the given key as a JSON-formatted string.
+        Parses the JSON from the pin (through the shared parse cache, so getters fed the same
+        document parse it once) and returns the value for the given key as a JSON-formatted string.
         If the key is not found or parsing fails, returns an empty string.
     """
     @classmethod
@@ -56,7 +58,7 @@ class SsnJSONGetKeyValue:
 
     def execute(self, json_string, key):
         try:
-            data = json.loads(json_string)
+            data = parse_json(json_string)
             if key in data:
                 value = data[key]
                 print(f"Key '{key}' found with value: {value}")
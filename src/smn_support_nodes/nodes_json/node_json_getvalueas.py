@@ -1,5 +1,6 @@
 from inspect import cleandoc
 import json
+from ..util_json_cache import parse_json
 
 class SsnJsonValueAs:
     """
@@ -22,7 +23,7 @@ class SsnJsonValueAs:
     CATEGORY (`str`):
         The category under which this node appears in the UI ("JSON").
     execute(json_value) -> tuple:
-        Parses the JSON value and returns a tuple:
+        Parses the JSON value (through the shared parse cache) and returns a tuple:
           - BOOL: The boolean interpretation of the value.
           - INT: The integer interpretation (or 0 if not convertible).
           - FLOAT: The float interpretation (or 0.0 if not convertible).
@@ -63,7 +64,7 @@ class SsnJsonValueAs:
         str_out = ""
 
         try:
-            parsed = json.loads(json_value)
+            parsed = parse_json(json_value)
         except (json.JSONDecodeError, TypeError):
             # If parsing fails, treat the raw string as a plain string value
             raw = json_value
@@ -0,0 +1,189 @@
+from inspect import cleandoc
+import json
+import re
+from functools import lru_cache
+from typing import Tuple
+from ..util_json_cache import parse_json
+
+# Outputs of the query node, one per path line
+MAX_PATHS = 8
+
+# One path step: .key / leading key, [index], [*] / .*, or a quoted ["key"] / ['key']
+_STEP_RE = re.compile(
+    r"""\.?(?P<key>[^.\[\]\s"']+)"""
+    r"""|\[\s*(?P<index>-?\d+)\s*\]"""
+    r"""|\[\s*\*\s*\]"""
+    r"""|\[\s*(?P<quote>["'])(?P<quoted>(?:\\.|(?!(?P=quote)).)*)(?P=quote)\s*\]"""
+)
+
+
+@lru_cache(maxsize=512)
+def compile_path(path: str) -> Tuple[tuple, ...]:
+    """
+    Compile a path like "scenes[*].prompt", "meta.size.w" or 'items[0]["a key"]' into steps:
+    ("key", name), ("index", i) or ("all", ). A leading "$" (the document root) is optional.
+    Cached per path string.
+    """
+    text = path.strip()
+    if text.startswith("$"):
+        text = text[1:]
+    steps = []
+    position = 0
+    while position < len(text):
+        match = _STEP_RE.match(text, position)
+        if match is None or (match.group("key") is not None and position and text[position] != "."):
+            raise ValueError(f"Invalid JSON path '{path}' at: '{text[position:]}'")
+        if match.group("key") is not None:
+            key = match.group("key")
+            steps.append(("all", ) if key == "*" else ("key", key))
+        elif match.group("index") is not None:
+            steps.append(("index", int(match.group("index"))))
+        elif match.group("quote") is not None:
+            # Quoted keys take JSON string escapes
+            quoted = match.group("quoted")
+            if match.group("quote") == "'":
+                quoted = quoted.replace("\\'", "'").replace('"', '\\"')
+            try:
+                steps.append(("key", json.loads(f'"{quoted}"')))
+            except ValueError:
+                raise ValueError(f"Invalid quoted key in JSON path '{path}': {match.group(0).strip()}")
+        else:
+            steps.append(("all", ))
+        position = match.end()
+    return tuple(steps)
+
+
+class _TrieNode:
+    __slots__ = ("children", "slots")
+
+    def __init__(self):
+        self.children = {}
+        self.slots = []
+
+
+@lru_cache(maxsize=128)
+def compile_query(paths: Tuple[str, ...]) -> Tuple[_TrieNode, Tuple[bool, ...]]:
+    """
+    Merge the compiled paths into a trie, so steps shared by several paths are walked once.
+    Returns the root and, per path, whether it has a wildcard (and so yields a list).
+    Cached per tuple of paths.
+    """
+    root = _TrieNode()
+    wildcards = []
+    for slot, path in enumerate(paths):
+        steps = compile_path(path)
+        node = root
+        for step in steps:
+            node = node.children.setdefault(step, _TrieNode())
+        node.slots.append(slot)
+        wildcards.append(any(step[0] == "all" for step in steps))
+    return root, tuple(wildcards)
+
+
+def _walk(value, node: _TrieNode, results: list) -> None:
+    for slot in node.slots:
+        results[slot].append(value)
+    for step, child in node.children.items():
+        if step[0] == "all":
+            items = value.values() if isinstance(value, dict) else value if isinstance(value, list) else ()
+            for item in items:
+                _walk(item, child, results)
+        elif isinstance(value, dict):
+            if step[0] == "key" and step[1] in value:
+                _walk(value[step[1]], child, results)
+        elif isinstance(value, list):
+            # Digits address arrays either way: items.0 or items[0]
+            index = step[1] if step[0] == "index" else int(step[1]) if step[1].lstrip("-").isdigit() else None
+            if index is not None and -len(value) <= index < len(value):
+                _walk(value[index], child, results)
+
+
+class SsnJsonQuery:
+    """
+    A node that takes a JSON-formatted string and up to eight paths, one per line, and outputs the
+    value at each path in one pass over the document.
+
+    Paths use dots and brackets: "meta.size.w", "scenes[0].prompt", 'tags["a key"]', with "*" or
+    "[*]" as a wildcard over every item of an array or object ("scenes[*].prompt"). A path with a
+    wildcard outputs a JSON array of every match.
+
+    Class methods
+    -------------
+    INPUT_TYPES (dict):
+        Defines the input fields for this node:
+          - "json_string": the JSON document as a string.
+          - "paths": the paths to extract, one per line.
+          - "unquote_strings" (optional): output string values as plain text instead of JSON.
+
+    Attributes
+    ----------
+    RETURN_TYPES (`tuple`):
+        Eight STRING outputs, one per path line, each the JSON-formatted value as the getter nodes
+        output it (feed SsnJsonValueAs for typed values). Missing values and unused outputs are
+        empty strings.
+    FUNCTION (`str`):
+        The name of the entry-point method. This node uses "execute".
+    CATEGORY (`str`):
+        The category under which this node appears in the UI ("JSON").
+    execute(json_string, paths) -> tuple:
+        Parses the document once (through the shared parse cache), walks it once for all paths
+        (compiled and cached), and serializes only the selected values.
+    """
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "json_string": (
+                    "STRING",
+                    {
+                        "multiline": False,
+                        "default": "{}"
+                    }
+                ),
+                "paths": (
+                    "STRING",
+                    {
+                        "multiline": True,
+                        "default": ""
+                    }
+                )
+            },
+            "optional": {
+                "unquote_strings": ("BOOLEAN", {"default": False}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING",) * MAX_PATHS
+    RETURN_NAMES = tuple(f"value_{i + 1}" for i in range(MAX_PATHS))
+    DESCRIPTION = cleandoc(__doc__)
+    FUNCTION = "execute"
+    CATEGORY = "JSON"
+
+    def __init__(self):
+        pass
+
+    def execute(self, json_string, paths, unquote_strings=False):
+        path_list = tuple(line.strip() for line in paths.splitlines() if line.strip())
+        if len(path_list) > MAX_PATHS:
+            raise ValueError(f"At most {MAX_PATHS} paths are supported, got {len(path_list)}")
+        root, wildcards = compile_query(path_list)
+
+        try:
+            data = parse_json(json_string)
+        except (json.JSONDecodeError, TypeError):
+            print("Invalid JSON string provided.")
+            return ("",) * MAX_PATHS
+
+        results = [[] for _ in path_list]
+        _walk(data, root, results)
+
+        def dump(value):
+            return value if unquote_strings and isinstance(value, str) else json.dumps(value)
+
+        outputs = []
+        for matches, wildcard in zip(results, wildcards):
+            if wildcard:
+                outputs.append(json.dumps(matches))
+            else:
+                outputs.append(dump(matches[0]) if matches else "")
+        return tuple(outputs) + ("",) * (MAX_PATHS - len(outputs))
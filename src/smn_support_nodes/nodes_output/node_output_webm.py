@@ -5,25 +5,115 @@ import torch
 import folder_paths
 import subprocess
 import os
+import queue
+import threading
 import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 
 from ..util_convert import (
-    convert_tensor_to_np_array,
+    convert_tensor_batch_to_np_array,
+)
+from ..util_encode_queue import label_turn, submit_encode_job
+from ..util_ffmpeg import get_ffmpeg_exe, get_ffmpeg_info, has_encoder, has_pix_fmt
+from ..util_webm_cache import (
+    cache_lookup,
+    cache_store,
+    fingerprint_frames,
+    format_cache_stats,
+    remove_stale_output,
 )
 
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple
 from PIL import Image
 
 
 class SsnOutputWebM:
     """
     A node that converts an image batch to WebM.
+
+    By default frames are streamed to ffmpeg as raw video over a pipe; set
+    frame_transport to "png" to stage them as PNG files on disk instead.
+    With encode_workers > 1 the batch is split into time segments that are
+    encoded by parallel ffmpeg processes and joined without re-encoding.
+    Frames are converted to uint8 chunk_frames at a time on a prefetch thread,
+    so extra memory stays proportional to the chunk size, not the batch.
+    Finished encodes are kept in a size-bounded LRU cache keyed by a
+    fingerprint of the frames and settings; identical re-runs reuse them.
+    With collapse_duplicates, runs of identical consecutive frames are sent
+    to ffmpeg once and held for the run's duration.
+    encoder_profile selects the codec and speed preset (VP8, VP9 or AV1,
+    depending on what the ffmpeg binary supports); threads are split
+    between the encode workers. AV1 profiles drop the alpha channel.
+    With async_encode the encode is handed to a background job queue and the
+    node returns a job id right away; see SsnOutputWebMStatus. Encodes of
+    the same output file run one at a time, in the order they were queued.
     """
 
+    # Raw pixel format handed to ffmpeg for each supported channel count
+    RAW_PIX_FMTS = {1: "gray", 2: "ya8", 3: "rgb24", 4: "rgba"}
+
+    # Segments shorter than this aren't worth a separate ffmpeg process
+    MIN_SEGMENT_FRAMES = 8
+
+    # Converted uint8 chunks buffered between the conversion thread and the encoder
+    PREFETCH_CHUNKS = 2
+
+    # Reused chunk buffers: the queued chunks, one waiting to be queued and one being consumed
+    CHUNK_BUFFERS = PREFETCH_CHUNKS + 2
+
+    # Above this many runs the retiming expression gets unwieldy; duplicates are encoded instead
+    MAX_COLLAPSED_RUNS = 4000
+
+    # Encoder profiles: ffmpeg encoder, its speed settings, whether it keeps alpha and whether it
+    # takes libvpx/libaom style -tile-columns. Alt-ref frames stay off so every frame is one packet.
+    ENCODER_PROFILES = {
+        "vp8": {
+            "codec": "libvpx", "alpha": True, "tiles": False,
+            "args": ["-auto-alt-ref", "0"],
+        },
+        "vp8_good": {
+            "codec": "libvpx", "alpha": True, "tiles": False,
+            "args": ["-auto-alt-ref", "0", "-deadline", "good", "-cpu-used", "2"],
+        },
+        "vp8_realtime": {
+            "codec": "libvpx", "alpha": True, "tiles": False,
+            "args": ["-auto-alt-ref", "0", "-deadline", "realtime", "-cpu-used", "8"],
+        },
+        "vp9_good": {
+            "codec": "libvpx-vp9", "alpha": True, "tiles": True,
+            "args": ["-auto-alt-ref", "0", "-deadline", "good", "-cpu-used", "2", "-row-mt", "1"],
+        },
+        "vp9_realtime": {
+            "codec": "libvpx-vp9", "alpha": True, "tiles": True,
+            "args": ["-auto-alt-ref", "0", "-deadline", "realtime", "-cpu-used", "8", "-row-mt", "1"],
+        },
+        "av1_svt": {
+            "codec": "libsvtav1", "alpha": False, "tiles": False,
+            "args": ["-preset", "8", "-pix_fmt", "yuv420p"],
+        },
+        "av1_aom": {
+            "codec": "libaom-av1", "alpha": False, "tiles": True,
+            "args": ["-cpu-used", "6", "-row-mt", "1", "-pix_fmt", "yuv420p"],
+        },
+    }
+
+    # Encode cache directory, relative to the Comfy output folder
+    CACHE_DIR_NAME = ".webm_cache"
+
     def __init__(self):
         pass
 
+    @classmethod
+    def available_profiles(cls) -> List[str]:
+        """
+        Encoder profiles whose encoder the ffmpeg binary supports (probed once per process).
+        """
+        profiles = [name for name, spec in cls.ENCODER_PROFILES.items() if has_encoder(spec["codec"])]
+        return profiles or ["vp8"]
+
     @classmethod
     def INPUT_TYPES(cls):
         """
@@ -37,11 +127,22 @@ class SsnOutputWebM:
                 "output_path": ("STRING",),
             },
             "optional": {
-                "pass_through": ("IMAGE",)
+                "pass_through": ("IMAGE",),
+                "frame_transport": (["pipe", "png"], {"default": "pipe"}),
+                "encoder_profile": (cls.available_profiles(), {"default": "vp8"}),
+                "encode_workers": ("INT", {"default": 1, "min": 1, "max": 64, "step": 1}),
+                "async_encode": ("BOOLEAN", {"default": False}),
+                "async_workers": ("INT", {"default": 1, "min": 1, "max": 16, "step": 1}),
+                "chunk_frames": ("INT", {"default": 16, "min": 1, "max": 1024, "step": 1}),
+                "collapse_duplicates": ("BOOLEAN", {"default": False}),
+                "duplicate_tolerance": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 1.0, "step": 0.001}),
+                "use_cache": ("BOOLEAN", {"default": True}),
+                "cache_max_mb": ("INT", {"default": 2048, "min": 1, "max": 1048576, "step": 64}),
             }
         }
 
-    RETURN_TYPES = ()
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("job_id",)
     OUTPUT_NODE = True
     DESCRIPTION = cleandoc(__doc__)
     FUNCTION = "execute"
@@ -70,7 +171,17 @@ class SsnOutputWebM:
         framerate: int,
         bitrate_mb: float,
         output_path: str,
-        pass_through: torch.Tensor = None
+        pass_through: torch.Tensor = None,
+        frame_transport: str = "pipe",
+        encoder_profile: str = "vp8",
+        encode_workers: int = 1,
+        async_encode: bool = False,
+        async_workers: int = 1,
+        chunk_frames: int = 16,
+        collapse_duplicates: bool = False,
+        duplicate_tolerance: float = 0.0,
+        use_cache: bool = True,
+        cache_max_mb: int = 2048
     ) -> tuple:
         # master log string
         log = ""
@@ -85,19 +196,38 @@ class SsnOutputWebM:
             err = f"Error: expected 4D tensor (N,H,W,C) or (N,C,H,W); got shape {tuple(images.shape)}"
             log += self._log_line(err)
             log += self._stage_end("Input Validation & Description", t0)
-            return (log,)
+            print(log)
+            return ("",)
 
         n, h, w, c = self._infer_nhwc_shape(images)
         if c not in (1, 2, 3, 4):
             err = f"Error: unsupported channel count {c}. Expected 1, 2, 3, or 4."
             log += self._log_line(err)
             log += self._stage_end("Input Validation & Description", t0)
-            return (log,)
+            print(log)
+            return ("",)
+
+        # Catch ffmpeg configuration problems before any frames are converted or written
+        ffmpeg_info = get_ffmpeg_info()
+        profile = self.ENCODER_PROFILES.get(encoder_profile)
+        err = None
+        if ffmpeg_info.exe is None:
+            err = f"Error: {ffmpeg_info.error}"
+        elif profile is None or not has_encoder(profile["codec"]):
+            err = f"Error: encoder profile '{encoder_profile}' is not supported by this ffmpeg build"
+        elif frame_transport == "pipe" and not has_pix_fmt(self.RAW_PIX_FMTS[c]):
+            err = f"Error: this ffmpeg build can't read raw {self.RAW_PIX_FMTS[c]} frames; use frame_transport 'png'"
+        if err:
+            log += self._log_line(err)
+            log += self._stage_end("Input Validation & Description", t0)
+            print(log)
+            return ("",)
 
         path_comfy_out = folder_paths.get_output_directory()
         path_gen_output = os.path.join(path_comfy_out, output_path)
         path_gen_frames = os.path.join(path_gen_output, "frames")
         path_gen_pass_through = os.path.join(path_gen_output, "pass_through")
+        path_gen_segments = os.path.join(path_gen_output, "segments")
 
         base_name = os.path.basename(output_path.rstrip("/\\"))
         output_file = os.path.join(path_gen_output, f"{base_name}.webm")
@@ -110,6 +240,18 @@ class SsnOutputWebM:
         log += self._log_line(f"  Bitrate: {bitrate_mb} MB")
         log += self._log_line(f"  Output Path (relative to Comfy output): {output_path}")
         log += self._log_line(f"  Pass-through provided: {'Yes' if pass_through is not None else 'No'}")
+        log += self._log_line(f"  ffmpeg: {ffmpeg_info.exe} ({ffmpeg_info.version})")
+        log += self._log_line(f"  Frame transport: {frame_transport}")
+        log += self._log_line(f"  Encoder profile: {encoder_profile} ({profile['codec']})")
+        if c in (2, 4) and not profile["alpha"]:
+            log += self._log_line("  Warning: this encoder has no alpha support; the alpha channel is dropped")
+        log += self._log_line(f"  Encode workers: {encode_workers}")
+        log += self._log_line(f"  Async encode: {'Yes' if async_encode else 'No'}")
+        log += self._log_line(f"  Chunk frames: {chunk_frames}")
+        log += self._log_line(
+            f"  Collapse duplicates: {f'Yes (tolerance {duplicate_tolerance})' if collapse_duplicates else 'No'}"
+        )
+        log += self._log_line(f"  Encode cache: {f'Yes (max {cache_max_mb} MB)' if use_cache else 'No'}")
 
         # Paths
         log += self._log_line("[Working Directories]")
@@ -126,7 +268,8 @@ class SsnOutputWebM:
             t1 = self._stage_start("Prepare Pass-through Frames")
             try:
                 pt_paths, pt_log = self._prepare_frames(
-                    pass_through, path_gen_pass_through, filename_prefix="pass_through_frame_"
+                    pass_through, path_gen_pass_through, filename_prefix="pass_through_frame_",
+                    chunk_frames=chunk_frames
                 )
                 log += self._log_line("[Pass-through]")
                 log += pt_log
@@ -135,89 +278,247 @@ class SsnOutputWebM:
                 log += self._log_line(f"Error preparing pass-through frames: {e}")
             log += self._stage_end("Prepare Pass-through Frames", t1)
 
-        # ---- Stage: Prepare Main Frames ----
-        t2 = self._stage_start("Prepare Frames")
-        try:
-            frame_paths, frames_log = self._prepare_frames(
-                images, path_gen_frames, filename_prefix="frame_"
+        encode_kwargs = {
+            "frame_transport": frame_transport,
+            "frames_dir": path_gen_frames,
+            "framerate": framerate,
+            "bitrate_mb": bitrate_mb,
+            "width": w,
+            "height": h,
+            "channels": c,
+            "chunk_frames": chunk_frames,
+            "encoder_profile": encoder_profile,
+        }
+
+        cache_dir = os.path.join(path_comfy_out, self.CACHE_DIR_NAME) if use_cache else None
+        collapse_tolerance = duplicate_tolerance if collapse_duplicates else None
+
+        if async_encode:
+            # Move frames off the device so a queued job doesn't hold on to VRAM
+            images = images.detach().cpu()
+            log_file = os.path.join(path_gen_output, f"{base_name}.log")
+            job_id = submit_encode_job(
+                output_file,
+                partial(
+                    self._run_encode_job,
+                    log, log_file, images, output_file, path_gen_output, path_gen_segments,
+                    encode_workers, encode_kwargs, cache_dir, cache_max_mb, collapse_tolerance
+                ),
+                workers=async_workers,
             )
-            log += frames_log
-            log += self._log_line(f"[Prepared {len(frame_paths)} frames for ffmpeg]")
-        except Exception as e:
-            log += self._log_line(f"Error preparing frames: {e}")
+            log += self._log_line(f"[Queued] Background encode job {job_id} (log: {log_file})")
+            print(log)
+            return {
+                "ui": {
+                    "text": [f"Queued WebM encode job {job_id}"]
+                },
+                "result": (job_id,)
+            }
+
+        # Wait for background jobs still writing the same output
+        with label_turn(output_file):
+            _, stages_log = self._run_encode_stages(
+                images, output_file, path_gen_output, path_gen_segments, encode_workers, encode_kwargs,
+                cache_dir, cache_max_mb, collapse_tolerance
+            )
+        log += stages_log
+
+        # Print once more at the end for debugging convenience
+        print(log)
+
+        # build a FileLocator-like list so ComfyUI can show it in the queue:
+        results = [{
+            "filename": os.path.basename(output_file),
+            "subfolder": os.path.dirname(output_file),
+            "type": "output"
+        }]
+
+        return {
+            "ui": {
+                "images": results,
+                "animated": (True,)
+            },
+            "result": ("",)
+        }
+
+    def _run_encode_stages(
+        self,
+        images: torch.Tensor,
+        output_file: str,
+        path_gen_output: str,
+        path_gen_segments: str,
+        encode_workers: int,
+        encode_kwargs: dict,
+        cache_dir: Optional[str] = None,
+        cache_max_mb: int = 0,
+        collapse_tolerance: Optional[float] = None,
+    ) -> Tuple[bool, str]:
+        """
+        Run the cache lookup, duplicate detection, frame preparation, ffmpeg encode and finalization stages.
+        Passing `cache_dir` enables the content-addressed encode cache; passing `collapse_tolerance`
+        collapses runs of identical frames into single frames with longer durations.
+        Returns (success, log text).
+        """
+        log = ""
+        n = images.shape[0]
+        segments = self._split_segments(n, encode_workers)
+
+        # ---- Stage: Encode Cache Lookup ----
+        cache_key = None
+        if cache_dir is not None:
+            tc = self._stage_start("Encode Cache Lookup")
+            try:
+                cache_key = fingerprint_frames(
+                    images, self._cache_settings(encode_kwargs, len(segments), collapse_tolerance)
+                )
+                hit = cache_lookup(cache_dir, cache_key, output_file)
+                log += self._log_line(f"[Encode Cache] {'HIT' if hit else 'MISS'} {cache_key}")
+                log += self._log_line(f"  {format_cache_stats()}")
+            except Exception as e:
+                cache_key, hit = None, False
+                log += self._log_line(f"Error using encode cache (encoding normally): {e}")
+            log += self._stage_end("Encode Cache Lookup", tc)
+
+            if hit:
+                log += self._log_line(f"[Success] WebM file restored from cache: {output_file}")
+                return True, log
+
+        # ---- Stage: Detect Duplicate Frames ----
+        run_starts = None
+        if collapse_tolerance is not None:
+            td = self._stage_start("Detect Duplicate Frames")
+            try:
+                run_starts = self._find_run_starts(images, collapse_tolerance, encode_kwargs["chunk_frames"])
+                log += self._log_line(
+                    f"[Duplicate Frames] Collapsed {n - len(run_starts)} of {n} frames into {len(run_starts)} runs"
+                )
+                if len(run_starts) == n:
+                    run_starts = None
+                elif len(run_starts) > self.MAX_COLLAPSED_RUNS:
+                    log += self._log_line(
+                        f"  Too many runs to retime (> {self.MAX_COLLAPSED_RUNS}); encoding every frame instead"
+                    )
+                    run_starts = None
+            except Exception as e:
+                run_starts = None
+                log += self._log_line(f"Error detecting duplicate frames (encoding every frame): {e}")
+            log += self._stage_end("Detect Duplicate Frames", td)
+
+        threads = self._threads_per_process(len(segments))
+        range_kwargs = dict(encode_kwargs, run_starts=run_starts, threads=threads)
+
+        # ---- Stage: Prepare Main Frames ----
+        if encode_kwargs["frame_transport"] == "png":
+            t2 = self._stage_start("Prepare Frames")
+            try:
+                # Only frames some segment actually emits need to be written
+                frame_indices = None
+                if run_starts is not None:
+                    frame_indices = sorted({
+                        src for start, end in segments
+                        for src, _ in self._emission_plan(start, end, run_starts)
+                    })
+                frame_paths, frames_log = self._prepare_frames(
+                    images, encode_kwargs["frames_dir"], filename_prefix="frame_",
+                    chunk_frames=encode_kwargs["chunk_frames"], indices=frame_indices
+                )
+                log += frames_log
+                log += self._log_line(f"[Prepared {len(frame_paths)} frames for ffmpeg]")
+            except Exception as e:
+                log += self._log_line(f"Error preparing frames: {e}")
+                log += self._stage_end("Prepare Frames", t2)
+                return False, log
             log += self._stage_end("Prepare Frames", t2)
-            return (log,)
-        log += self._stage_end("Prepare Frames", t2)
 
         # ---- Stage: ffmpeg Encode ----
         t3 = self._stage_start("ffmpeg Encode")
 
-        ffmpeg_cmd = [
-            "ffmpeg",
-            "-y",
-            "-framerate", str(framerate),
-            "-pattern_type", "sequence",
-            "-start_number", "0",
-            "-i", os.path.join(path_gen_frames, "frame_%02d.png"),
-            "-s", f"{w}x{h}",
-            "-c:v", "libvpx",
-            "-b:v", f"{bitrate_mb}M",
-            "-c:a", "libopus",
-            "-auto-alt-ref", "0",
-            output_file
-        ]
-
-        log += self._log_line("[ffmpeg Command]")
-        log += self._log_line("  " + " ".join(ffmpeg_cmd))
-
+        returncode = None
         try:
-            result = subprocess.run(
-                ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                check=False
-            )
-            log += self._log_line(f"ffmpeg exit code: {result.returncode}")
-            # keep ffmpeg output as a block for readability
-            log += "\n" + "-" * 28 + " ffmpeg output " + "-" * 28 + "\n"
-            log += result.stdout
-            log += "\n" + "-" * 72 + "\n"
+            os.makedirs(path_gen_output, exist_ok=True)
+            stale_error = remove_stale_output(output_file)
+            if stale_error:
+                log += self._log_line(f"Warning: could not remove previous output file: {stale_error}")
+            if len(segments) == 1:
+                returncode, encode_log = self._encode_range(images, 0, n, output_file, **range_kwargs)
+            else:
+                log += self._log_line(f"[Segment-parallel encode: {len(segments)} segments]")
+                returncode, encode_log = self._encode_segmented(
+                    images, segments, output_file, path_gen_segments, **range_kwargs
+                )
+            log += encode_log
 
-            if result.returncode != 0:
+            if returncode != 0:
                 log += self._log_line("Error: ffmpeg reported a non-zero exit code.")
         except Exception as e:
             log += self._log_line(f"Error running ffmpeg: {e}")
             log += self._stage_end("ffmpeg Encode", t3)
-            return (log,)
+            return False, log
 
         log += self._stage_end("ffmpeg Encode", t3)
 
+        # ---- Stage: Encode Cache Store ----
+        if cache_key is not None and returncode == 0:
+            tc = self._stage_start("Encode Cache Store")
+            try:
+                evicted = cache_store(cache_dir, cache_key, output_file, cache_max_mb * 1024 * 1024)
+                log += self._log_line(f"[Encode Cache] Stored {cache_key}; evicted {len(evicted)} entries")
+                log += self._log_line(f"  {format_cache_stats()}")
+            except Exception as e:
+                log += self._log_line(f"Error storing encode in cache: {e}")
+            log += self._stage_end("Encode Cache Store", tc)
+
         # ---- Stage: Finalization ----
         t4 = self._stage_start("Finalization")
-        if 'result' in locals() and result.returncode == 0:
+        if returncode == 0:
             log += self._log_line(f"[Success] WebM file created: {output_file}")
         else:
             log += self._log_line("[Failure] WebM file creation failed")
         log += self._stage_end("Finalization", t4)
 
-        # Print once more at the end for debugging convenience
-        print(log)
-
-        # build a FileLocator-like list so ComfyUI can show it in the queue:
-        results = [{
-            "filename": os.path.basename(output_file),
-            "subfolder": os.path.dirname(output_file),
-            "type": "output"
-        }]
+        return returncode == 0, log
 
+    def _cache_settings(
+        self,
+        encode_kwargs: dict,
+        segment_count: int,
+        collapse_tolerance: Optional[float]
+    ) -> dict:
+        """
+        The encode settings that affect the bytes of the output file, for cache keys.
+        """
         return {
-            "ui": {
-                "images": results,
-                "animated": (True,)
-            }
+            "framerate": encode_kwargs["framerate"],
+            "bitrate_mb": encode_kwargs["bitrate_mb"],
+            "width": encode_kwargs["width"],
+            "height": encode_kwargs["height"],
+            "channels": encode_kwargs["channels"],
+            "codec": self.ENCODER_PROFILES[encode_kwargs["encoder_profile"]]["codec"],
+            "encoder_profile": encode_kwargs["encoder_profile"],
+            "threads": self._threads_per_process(segment_count),
+            "segments": segment_count,
+            "collapse_tolerance": collapse_tolerance,
         }
 
+    def _run_encode_job(
+        self,
+        log_prefix: str,
+        log_file: str,
+        *stage_args
+    ) -> Tuple[bool, str]:
+        """
+        Background job body: run the encode stages, then print the full log and write it next to the output.
+        """
+        ok, stages_log = self._run_encode_stages(*stage_args)
+        log = log_prefix + stages_log
+        print(log)
+        try:
+            with open(log_file, "w", encoding="utf-8") as f:
+                f.write(log)
+        except OSError as e:
+            log += self._log_line(f"Error writing job log {log_file}: {e}")
+        return ok, log
+
     def _infer_nhwc_shape(self, images: torch.Tensor) -> Tuple[int, int, int, int]:
         """
         Accept (N,H,W,C) or (N,C,H,W). Return as NHWC shape tuple.
@@ -233,11 +534,464 @@ class SsnOutputWebM:
             n, h, w, c = images.shape
             return int(n), int(h), int(w), int(c)
 
+    def _split_segments(self, n: int, workers: int) -> List[Tuple[int, int]]:
+        """
+        Split n frames into at most `workers` contiguous [start, end) ranges of near-equal length.
+        """
+        count = max(1, min(workers, n // self.MIN_SEGMENT_FRAMES))
+        bounds = [round(i * n / count) for i in range(count + 1)]
+        return [(bounds[i], bounds[i + 1]) for i in range(count)]
+
+    def _build_ffmpeg_cmd(
+        self,
+        input_args: List[str],
+        output_file: str,
+        bitrate_mb: float,
+        width: int,
+        height: int,
+        encoder_profile: str,
+        threads: int,
+        output_args: List[str] = (),
+    ) -> List[str]:
+        """
+        Assemble the encode command for `encoder_profile` around the given input arguments.
+        """
+        profile = self.ENCODER_PROFILES[encoder_profile]
+        codec_args = ["-c:v", profile["codec"], *profile["args"], "-threads", str(threads)]
+        if profile["tiles"]:
+            # Tile columns are at least 256 px wide; the option takes log2 of the column count
+            codec_args += ["-tile-columns", str(min(6, max(0, (width // 256).bit_length() - 1)))]
+        return [
+            get_ffmpeg_exe(),
+            "-y",
+            *input_args,
+            "-s", f"{width}x{height}",
+            *codec_args,
+            "-b:v", f"{bitrate_mb}M",
+            "-c:a", "libopus",
+            *output_args,
+            output_file
+        ]
+
+    def _threads_per_process(self, processes: int) -> int:
+        """
+        Share the machine's cores between `processes` concurrent ffmpeg encodes.
+        """
+        return max(1, (os.cpu_count() or 1) // max(1, processes))
+
+    def _run_ffmpeg(self, ffmpeg_cmd: List[str]) -> Tuple[int, str]:
+        """
+        Run ffmpeg to completion. Returns (exit code, combined stdout/stderr text).
+        """
+        result = subprocess.run(
+            ffmpeg_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            check=False
+        )
+        return result.returncode, result.stdout
+
+    def _format_ffmpeg_result(self, ffmpeg_cmd: List[str], returncode: int, output: str) -> str:
+        """
+        Render an ffmpeg invocation and its output as a log block.
+        """
+        log = self._log_line("[ffmpeg Command]")
+        log += self._log_line("  " + " ".join(ffmpeg_cmd))
+        log += self._log_line(f"ffmpeg exit code: {returncode}")
+        # keep ffmpeg output as a block for readability
+        log += "\n" + "-" * 28 + " ffmpeg output " + "-" * 28 + "\n"
+        log += output
+        log += "\n" + "-" * 72 + "\n"
+        return log
+
+    def _encode_range(
+        self,
+        images: torch.Tensor,
+        start: int,
+        end: int,
+        output_file: str,
+        frame_transport: str,
+        frames_dir: str,
+        framerate: int,
+        bitrate_mb: float,
+        width: int,
+        height: int,
+        channels: int,
+        chunk_frames: int,
+        encoder_profile: str,
+        threads: int,
+        run_starts: Optional[List[int]] = None,
+    ) -> Tuple[int, str]:
+        """
+        Encode frames [start, end) of `images` into `output_file` with a single ffmpeg process.
+        PNG transport reads the frames already staged in `frames_dir`; pipe transport streams them.
+        With `run_starts`, only the first frame of each run is emitted and held for the run's length.
+        Returns (exit code, log text).
+        """
+        if run_starts is not None:
+            return self._encode_range_collapsed(
+                images, start, end, output_file, frame_transport, frames_dir, framerate,
+                bitrate_mb, width, height, channels, chunk_frames, encoder_profile, threads, run_starts
+            )
+
+        if frame_transport == "png":
+            input_args = [
+                "-framerate", str(framerate),
+                "-pattern_type", "sequence",
+                "-start_number", str(start),
+                "-i", os.path.join(frames_dir, "frame_%02d.png"),
+            ]
+            output_args = ["-frames:v", str(end - start)]
+        else:
+            input_args = [
+                "-f", "rawvideo",
+                "-pix_fmt", self.RAW_PIX_FMTS[channels],
+                "-s", f"{width}x{height}",
+                "-framerate", str(framerate),
+                "-i", "-",
+            ]
+            output_args = []
+
+        ffmpeg_cmd = self._build_ffmpeg_cmd(
+            input_args, output_file, bitrate_mb, width, height, encoder_profile, threads, output_args
+        )
+
+        if frame_transport == "png":
+            returncode, output = self._run_ffmpeg(ffmpeg_cmd)
+            log = ""
+        else:
+            returncode, output = self._run_ffmpeg_pipe(ffmpeg_cmd, images[start:end], chunk_frames)
+            log = self._log_line(f"[Streamed {end - start} frames to ffmpeg over stdin]")
+
+        return returncode, log + self._format_ffmpeg_result(ffmpeg_cmd, returncode, output)
+
+    def _encode_range_collapsed(
+        self,
+        images: torch.Tensor,
+        start: int,
+        end: int,
+        output_file: str,
+        frame_transport: str,
+        frames_dir: str,
+        framerate: int,
+        bitrate_mb: float,
+        width: int,
+        height: int,
+        channels: int,
+        chunk_frames: int,
+        encoder_profile: str,
+        threads: int,
+        run_starts: List[int],
+    ) -> Tuple[int, str]:
+        """
+        Variable frame duration variant of `_encode_range`. PNG transport feeds the staged frames
+        through a concat demuxer list with per-frame durations; pipe transport streams the emitted
+        frames and rewrites the encoded packets' timestamps and durations with the setts filter.
+        """
+        plan = self._emission_plan(start, end, run_starts)
+        length = end - start
+        pts = [p for _, p in plan]
+        durations = [b - a for a, b in zip(pts, pts[1:] + [length])]
+
+        if frame_transport == "png":
+            # The concat demuxer gives the final entry a default duration, so the last run's
+            # frame is listed again on the last timestamp to keep the run at full length
+            last_src, last_pts = plan[-1]
+            entries = list(zip(plan, durations))
+            if last_pts < length - 1:
+                entries[-1] = ((last_src, last_pts), durations[-1] - 1)
+                entries.append(((last_src, length - 1), 1))
+            list_path = os.path.join(frames_dir, f"concat_{start:06d}.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                f.write("ffconcat version 1.0\n")
+                for (src, _), duration in entries:
+                    f.write(f"file 'frame_{src:02d}.png'\n")
+                    f.write(f"option framerate {framerate}\n")
+                    f.write(f"duration {duration / framerate:.6f}\n")
+            input_args = ["-f", "concat", "-safe", "0", "-i", list_path]
+            output_args = ["-fps_mode", "vfr"]
+        else:
+            input_args = [
+                "-f", "rawvideo",
+                "-pix_fmt", self.RAW_PIX_FMTS[channels],
+                "-s", f"{width}x{height}",
+                "-framerate", str(framerate),
+                "-i", "-",
+            ]
+            # One packet per emitted frame (no alt-ref frames), so packet number N maps to plan[N]
+            scale = f"/({framerate}*TB)"
+            setts = (
+                f"setts=ts='({self._lookup_expression(pts)}){scale}'"
+                f":duration='({self._lookup_expression(durations)}){scale}'"
+            )
+            output_args = ["-bsf:v", setts]
+
+        ffmpeg_cmd = self._build_ffmpeg_cmd(
+            input_args, output_file, bitrate_mb, width, height, encoder_profile, threads, output_args
+        )
+
+        if frame_transport == "png":
+            returncode, output = self._run_ffmpeg(ffmpeg_cmd)
+            log = self._log_line(f"[Emitted {len(plan)} of {length} frames via concat list]")
+        else:
+            returncode, output = self._run_ffmpeg_pipe(
+                ffmpeg_cmd, images, chunk_frames, indices=[src for src, _ in plan]
+            )
+            log = self._log_line(f"[Streamed {len(plan)} of {length} frames to ffmpeg over stdin]")
+
+        return returncode, log + self._format_ffmpeg_result(ffmpeg_cmd, returncode, output)
+
+    def _find_run_starts(self, images: torch.Tensor, tolerance: float, chunk_frames: int) -> List[int]:
+        """
+        Return the index of the first frame of every run of consecutive frames whose largest
+        per-pixel difference from the previous frame is within `tolerance` (in [0,1] units).
+        Compares whole chunks of frame pairs at once.
+        """
+        n = images.shape[0]
+        starts = [0]
+        step = max(1, chunk_frames)
+        for s in range(1, n, step):
+            e = min(n, s + step)
+            cur, prev = images[s:e].detach(), images[s - 1:e - 1].detach()
+            if tolerance > 0:
+                if not cur.dtype.is_floating_point:
+                    cur, prev = cur.float() / 255.0, prev.float() / 255.0
+                same = (cur - prev).abs().flatten(1).amax(dim=1) <= tolerance
+            else:
+                same = (cur == prev).flatten(1).all(dim=1)
+            starts.extend((torch.nonzero(~same).flatten() + s).tolist())
+        return starts
+
+    def _emission_plan(self, start: int, end: int, run_starts: List[int]) -> List[Tuple[int, int]]:
+        """
+        Frames to emit for [start, end) as (source index, pts in frames relative to start):
+        the range's first frame, then the first frame of every run that begins inside it.
+        """
+        first = bisect_right(run_starts, start)
+        plan = [(start, 0)]
+        for i in range(first, len(run_starts)):
+            src = run_starts[i]
+            if src >= end:
+                break
+            plan.append((src, src - start))
+        return plan
+
+    def _lookup_expression(self, values: List[int]) -> str:
+        """
+        Build an ffmpeg expression mapping packet number N to values[N], as a balanced
+        tree of comparisons so its depth stays logarithmic in the number of frames.
+        """
+        def build(lo: int, hi: int) -> str:
+            if hi - lo == 1:
+                return str(values[lo])
+            mid = (lo + hi) // 2
+            return f"if(lt(N,{mid}),{build(lo, mid)},{build(mid, hi)})"
+        return build(0, len(values))
+
+    def _encode_segmented(
+        self,
+        images: torch.Tensor,
+        segments: List[Tuple[int, int]],
+        output_file: str,
+        segments_dir: str,
+        **encode_kwargs
+    ) -> Tuple[int, str]:
+        """
+        Encode each segment in its own ffmpeg process in parallel, then join the parts
+        with the concat demuxer (stream copy, no re-encode). Every segment starts on a keyframe.
+        Returns (exit code, log text).
+        """
+        if os.path.isdir(segments_dir):
+            shutil.rmtree(segments_dir)
+        os.makedirs(segments_dir, exist_ok=True)
+
+        segment_files = [os.path.join(segments_dir, f"segment_{i:03d}.webm") for i in range(len(segments))]
+
+        with ThreadPoolExecutor(max_workers=len(segments)) as pool:
+            futures = [
+                pool.submit(self._encode_range, images, start, end, segment_file, **encode_kwargs)
+                for (start, end), segment_file in zip(segments, segment_files)
+            ]
+            results = [future.result() for future in futures]
+
+        log = ""
+        for i, ((start, end), (returncode, segment_log)) in enumerate(zip(segments, results)):
+            log += self._log_line(f"[Segment {i}: frames {start}-{end - 1}]")
+            log += segment_log
+
+        failed = [returncode for returncode, _ in results if returncode != 0]
+        if failed:
+            return failed[0], log
+
+        # Join the parts; paths in the list are resolved relative to the list file, and explicit
+        # durations keep each part at its exact offset
+        framerate = encode_kwargs["framerate"]
+        list_path = os.path.join(segments_dir, "segments.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for (start, end), segment_file in zip(segments, segment_files):
+                f.write(f"file '{os.path.basename(segment_file)}'\n")
+                f.write(f"duration {(end - start) / framerate:.6f}\n")
+
+        concat_cmd = [get_ffmpeg_exe(), "-y", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", output_file]
+        returncode, output = self._run_ffmpeg(concat_cmd)
+        log += self._log_line("[Concat Segments]")
+        log += self._format_ffmpeg_result(concat_cmd, returncode, output)
+
+        if returncode == 0:
+            shutil.rmtree(segments_dir, ignore_errors=True)
+        return returncode, log
+
+    def _chunk_to_uint8_nhwc(
+        self,
+        chunk: torch.Tensor,
+        nhwc_like: bool,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Convert a run of frames (NHWC or NCHW; float [0,1] or uint8) to a contiguous N×H×W×C uint8 array,
+        written into `out` when given. Clamp/scale/cast happen on the source device so only uint8 data
+        is copied to the host.
+        """
+        if chunk.ndim != 4:
+            raise ValueError(f"Expected a rank 4 frame chunk, got shape {tuple(chunk.shape)}")
+
+        # Convert to NHWC
+        if not nhwc_like:
+            chunk = chunk.permute(0, 2, 3, 1)
+
+        return convert_tensor_batch_to_np_array(chunk, out=out)
+
+    def _iter_uint8_chunks(
+        self,
+        images: torch.Tensor,
+        chunk_frames: int,
+        indices: Optional[List[int]] = None,
+        buffers: int = 0
+    ) -> Iterator[np.ndarray]:
+        """
+        Yield `images` (or just the frames at `indices`, in order) as uint8 NHWC arrays
+        of at most `chunk_frames` frames each.
+        With `buffers` > 0 the arrays come from a ring of that many reused buffers, so a yielded
+        array is overwritten `buffers` chunks later; the consumer must be done with it by then.
+        """
+        nhwc_like = images.shape[-1] in (1, 2, 3, 4)
+        step = max(1, chunk_frames)
+        _, h, w, c = self._infer_nhwc_shape(images)
+        ring: List[Optional[np.ndarray]] = [None] * buffers
+
+        def next_out(i: int, count: int) -> Optional[np.ndarray]:
+            if not ring:
+                return None
+            slot = i % len(ring)
+            if ring[slot] is None:
+                ring[slot] = np.empty((step, h, w, c), dtype=np.uint8)
+            return ring[slot][:count]
+
+        if indices is None:
+            for i, start in enumerate(range(0, images.shape[0], step)):
+                chunk = images[start:start + step]
+                yield self._chunk_to_uint8_nhwc(chunk, nhwc_like, next_out(i, chunk.shape[0]))
+        else:
+            for i, start in enumerate(range(0, len(indices), step)):
+                index = torch.tensor(indices[start:start + step], device=images.device)
+                chunk = images.index_select(0, index)
+                yield self._chunk_to_uint8_nhwc(chunk, nhwc_like, next_out(i, chunk.shape[0]))
+
+    def _prefetch(self, chunks: Iterator[np.ndarray], depth: int) -> Iterator[np.ndarray]:
+        """
+        Pull items from `chunks` on a background thread, keeping at most `depth` of them buffered.
+        Conversion of the next chunks overlaps with whatever the caller does with the current one,
+        while peak memory stays bounded by the buffer depth.
+        """
+        buffer: "queue.Queue" = queue.Queue(maxsize=max(1, depth))
+        stop = threading.Event()
+        finished = object()
+
+        def put(item) -> bool:
+            # Give up once the consumer has gone away so the thread can exit
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for chunk in chunks:
+                    if not put(chunk):
+                        return
+                put(finished)
+            except Exception as e:
+                put(e)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            producer.join()
+
+    def _run_ffmpeg_pipe(
+        self,
+        ffmpeg_cmd: List[str],
+        images: torch.Tensor,
+        chunk_frames: int,
+        indices: Optional[List[int]] = None
+    ) -> Tuple[int, str]:
+        """
+        Run ffmpeg with raw frames (all of `images`, or those at `indices`) written to its stdin,
+        converted `chunk_frames` at a time. Returns (exit code, combined stdout/stderr text).
+        """
+        proc = subprocess.Popen(
+            ffmpeg_cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+
+        # Drain ffmpeg output concurrently so a full pipe can't stall the frame writes
+        output_chunks: List[bytes] = []
+        reader = threading.Thread(target=lambda: output_chunks.append(proc.stdout.read()), daemon=True)
+        reader.start()
+
+        chunks = self._prefetch(
+            self._iter_uint8_chunks(images, chunk_frames, indices, self.CHUNK_BUFFERS), self.PREFETCH_CHUNKS
+        )
+        try:
+            for chunk in chunks:
+                proc.stdin.write(chunk)
+        except BrokenPipeError:
+            # ffmpeg exited early; its exit code and output explain why
+            pass
+        finally:
+            chunks.close()
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+
+        returncode = proc.wait()
+        reader.join()
+        output = b"".join(output_chunks).decode("utf-8", errors="replace")
+        return returncode, output
+
     def _prepare_frames(
         self,
         images: torch.Tensor,
         frames_dir: str,
-        filename_prefix: str = "frame_"
+        filename_prefix: str = "frame_",
+        chunk_frames: int = 16,
+        indices: Optional[List[int]] = None
     ) -> tuple[List[str], str]:
         """
         Save each frame in `images` (supports N×H×W×{1,2,3,4} or N×{1,2,3,4}×H×W; float [0,1] or uint8)
@@ -248,7 +1002,9 @@ class SsnOutputWebM:
           channels == 3 -> 'RGB'
           channels == 4 -> 'RGBA'
 
-        Preserves channel semantics; does not force alpha.
+        Preserves channel semantics; does not force alpha. Frames are converted `chunk_frames`
+        at a time on a prefetch thread while the previous chunk is being written.
+        With `indices`, only those frames are saved (files keep their original frame number).
         """
         # Stage timing for this helper
         t0 = time.perf_counter()
@@ -262,31 +1018,13 @@ class SsnOutputWebM:
         lines: List[str] = []
         lines.append(self._log_line(f"[Saving frames to: {frames_dir}]"))
 
-        nhwc_like = images.shape[-1] in (1, 2, 3, 4)
-        n = images.shape[0]
-
-        for idx in range(n):
-            frame = images[idx]
-
-            # Detach & CPU
-            frame = frame.detach().cpu()
-
-            # Convert to HWC
-            if frame.ndim == 3:
-                if nhwc_like:
-                    hwc = frame
-                else:
-                    hwc = frame.permute(1, 2, 0)
-            else:
-                raise ValueError(f"Expected per-frame tensor of rank 3, got shape {tuple(frame.shape)}")
-
-            # Ensure uint8 in [0,255]
-            if hwc.dtype.is_floating_point:
-                hwc = hwc.clamp(0.0, 1.0).mul(255.0).to(torch.uint8)
-            elif hwc.dtype != torch.uint8:
-                hwc = hwc.to(torch.uint8)
+        chunks = self._prefetch(
+            self._iter_uint8_chunks(images, chunk_frames, indices, self.CHUNK_BUFFERS), self.PREFETCH_CHUNKS
+        )
+        frames = (frame_np for chunk in chunks for frame_np in chunk)
+        frame_numbers = indices if indices is not None else range(images.shape[0])
 
-            frame_np = hwc.numpy()
+        for idx, frame_np in zip(frame_numbers, frames):
             channels = frame_np.shape[2]
 
             # Pick PIL mode
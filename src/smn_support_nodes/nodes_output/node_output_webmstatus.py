@@ -0,0 +1,67 @@
+from inspect import cleandoc
+from ..util_encode_queue import get_job, pending_jobs
+
+class SsnOutputWebMStatus:
+    """
+    A node that reports the status and log of a background WebM encode job queued by SsnOutputWebM.
+
+    Class methods
+    -------------
+    INPUT_TYPES (dict):
+        Defines the input fields for this node: the job id returned by SsnOutputWebM.
+    IS_CHANGED (float):
+        Always reports a change so the status is re-read every time the prompt is queued.
+
+    Attributes
+    ----------
+    RETURN_TYPES (`tuple`):
+        The types of the output tuple: STRING, STRING.
+    RETURN_NAMES (`tuple`):
+        The names of the outputs ("status", "log").
+    FUNCTION (`str`):
+        The entry-point method name ("execute").
+    CATEGORY (`str`):
+        The category under which this node appears in the UI ("output").
+    execute(job_id) -> tuple:
+        Returns (status, log). Status is one of "queued", "running", "done", "failed" or "unknown".
+    """
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "job_id": (
+                    "STRING",
+                    {
+                        "multiline": False,
+                        "default": ""
+                    }
+                )
+            }
+        }
+
+    @classmethod
+    def IS_CHANGED(cls, job_id):
+        return float("nan")
+
+    RETURN_TYPES = ("STRING", "STRING",)
+    RETURN_NAMES = ("status", "log",)
+    DESCRIPTION = cleandoc(__doc__)
+    FUNCTION = "execute"
+    CATEGORY = "output"
+
+    def __init__(self):
+        pass
+
+    def execute(self, job_id):
+        job = get_job(job_id.strip())
+        if job is None:
+            return ("unknown", "")
+
+        status = job["status"]
+        if status == "queued":
+            log = f"Submitted {job['submitted']}; {pending_jobs()} job(s) waiting."
+        elif status == "running":
+            log = f"Started {job['started']}."
+        else:
+            log = job["log"]
+        return (status, log)
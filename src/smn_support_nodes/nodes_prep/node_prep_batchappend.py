@@ -1,10 +1,18 @@
 from inspect import cleandoc
 import torch  # type: ignore
+import torch.nn.functional as F  # type: ignore
 
 class SsnPrepAppendBatch:
     """
-    A node that appends one batch of images to another if they are the same size.
+    A node that appends image batches to each other, in order (images_a, images_b, then any of the
+    optional images_c to images_h that are connected). The result is allocated once.
+    By default every batch must be the same size. mismatch_mode "pad" centers smaller frames on a
+    transparent canvas the size of the largest, and "resize" scales every batch to images_a's size.
     """
+
+    # Optional inputs beyond images_a / images_b, appended in this order
+    EXTRA_INPUTS = ("images_c", "images_d", "images_e", "images_f", "images_g", "images_h")
+
     def __init__(self):
         pass
 
@@ -15,6 +23,10 @@ class SsnPrepAppendBatch:
                 "images_a": ("IMAGE", ),
                 "images_b": ("IMAGE", ),
             },
+            "optional": {
+                **{name: ("IMAGE", ) for name in cls.EXTRA_INPUTS},
+                "mismatch_mode": (["error", "pad", "resize"], {"default": "error"}),
+            },
         }
 
     RETURN_TYPES = ("IMAGE", )
@@ -22,12 +34,48 @@ class SsnPrepAppendBatch:
     FUNCTION = "execute"
     CATEGORY = "smn/prep"
 
-    def execute(self, images_a: torch.Tensor, images_b: torch.Tensor):
-        # Check if the image batches have the same shape
-        if images_a.shape[1:] != images_b.shape[1:]:
+    def execute(self, images_a: torch.Tensor, images_b: torch.Tensor, mismatch_mode: str = "error", **extra):
+        batches = [images_a, images_b] + [extra[name] for name in self.EXTRA_INPUTS if extra.get(name) is not None]
+
+        # Validate every input once, up front
+        channels = images_a.shape[3]
+        if any(batch.shape[3] != channels for batch in batches):
+            raise ValueError("Image batches must have the same number of channels.")
+        sizes = {tuple(batch.shape[1:3]) for batch in batches}
+        if mismatch_mode == "error" and len(sizes) > 1:
             raise ValueError("Image batches must have the same dimensions except for the batch size.")
+        if mismatch_mode == "pad":
+            height = max(h for h, _ in sizes)
+            width = max(w for _, w in sizes)
+        elif mismatch_mode in ("error", "resize"):
+            height, width = images_a.shape[1:3]
+        else:
+            raise ValueError(f"Unknown mismatch_mode: {mismatch_mode}")
+
+        # Allocate the result once and copy each batch into its slice
+        total = sum(batch.shape[0] for batch in batches)
+        result = torch.empty((total, height, width, channels), dtype=images_a.dtype, device=images_a.device)
+
+        offset = 0
+        for batch in batches:
+            n, h, w, _ = batch.shape
+            target = result[offset:offset + n]
+            offset += n
 
-        # Concatenate the batches along the batch dimension
-        result = torch.cat((images_a, images_b), dim=0)
+            if (h, w) == (height, width):
+                target.copy_(batch)
+            elif mismatch_mode == "pad":
+                # Transparent border around the centered frames
+                top = (height - h) // 2
+                left = (width - w) // 2
+                target.zero_()
+                target[:, top:top + h, left:left + w].copy_(batch)
+            else:
+                # interpolate works on NCHW
+                scaled = F.interpolate(
+                    batch.to(device=result.device, dtype=torch.float32).permute(0, 3, 1, 2),
+                    size=(height, width), mode="bilinear", align_corners=False, antialias=True
+                )
+                target.copy_(scaled.permute(0, 2, 3, 1).clamp_(0.0, 1.0))
 
         return (result, )
@@ -0,0 +1,144 @@
+from inspect import cleandoc
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+import torch  # type: ignore
+
+# Most frames one expression may select (repeats included); resolved index lists are cached, so
+# this also bounds the cache's memory
+MAX_SELECTED_FRAMES = 65536
+
+# One comma-separated term: an index, a slice, a keyword for the whole batch, or reverse(...) /
+# pingpong(...) around an index or slice, optionally followed by "*count" to repeat it
+_TERM_RE = re.compile(
+    r"^(?:(?P<fn>reverse|pingpong)\s*\((?P<inner>[^()]*)\)|(?P<kw>all|reverse|pingpong)|(?P<sel>[-+\d\s:]+))"
+    r"\s*(?:\*\s*(?P<repeat>\d+))?$"
+)
+
+
+def _parse_selection(text: str) -> Tuple[Optional[int], ...]:
+    """
+    Parse "i" into (i,) and "start:stop[:step]" into (start, stop, step), with None for omitted parts.
+    """
+    parts = [part.strip() for part in text.split(":")]
+    if len(parts) > 3 or (len(parts) == 1 and not parts[0]):
+        raise ValueError(f"Invalid index or slice: '{text}'")
+    try:
+        values = tuple(int(part) if part else None for part in parts)
+    except ValueError:
+        raise ValueError(f"Invalid index or slice: '{text}'")
+    if len(values) == 3 and values[2] == 0:
+        raise ValueError(f"Slice step cannot be zero: '{text}'")
+    return values
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression: str) -> Tuple[tuple, ...]:
+    """
+    Compile a selection expression into (mode, selection, repeat) terms. Cached per expression string.
+    """
+    terms = []
+    for raw in expression.split(","):
+        term = raw.strip().lower()
+        if not term:
+            continue
+        match = _TERM_RE.match(term)
+        if match is None:
+            raise ValueError(f"Invalid selection term: '{raw.strip()}'")
+        repeat = int(match.group("repeat") or 1)
+        if repeat > MAX_SELECTED_FRAMES:
+            raise ValueError(
+                f"Repeat count {repeat} exceeds the limit of {MAX_SELECTED_FRAMES}: '{raw.strip()}'"
+            )
+        if match.group("fn"):
+            terms.append((match.group("fn"), _parse_selection(match.group("inner")), repeat))
+        elif match.group("kw"):
+            mode = "forward" if match.group("kw") == "all" else match.group("kw")
+            terms.append((mode, (None, None, None), repeat))
+        else:
+            terms.append(("forward", _parse_selection(match.group("sel")), repeat))
+    if not terms:
+        raise ValueError("Selection expression is empty")
+    return tuple(terms)
+
+
+@lru_cache(maxsize=256)
+def resolve_expression(expression: str, batch_size: int) -> Tuple[int, ...]:
+    """
+    Resolve an expression to the frame indices it selects from a batch of `batch_size` frames.
+    Indices and slices follow Python semantics, including negative values.
+    """
+    indices = []
+    for mode, selection, repeat in compile_expression(expression):
+        if len(selection) == 1:
+            index = selection[0] + batch_size if selection[0] < 0 else selection[0]
+            if not 0 <= index < batch_size:
+                raise ValueError(f"Index {selection[0]} is out of range for a batch of {batch_size}")
+            frames = [index]
+        else:
+            frames = list(range(batch_size)[slice(*selection)])
+
+        if mode == "reverse":
+            frames.reverse()
+        elif mode == "pingpong":
+            frames = frames + frames[-2:0:-1]
+        if len(indices) + len(frames) * repeat > MAX_SELECTED_FRAMES:
+            raise ValueError(f"Selection '{expression}' selects more than {MAX_SELECTED_FRAMES} frames")
+        indices.extend(frames * repeat)
+
+    if not indices:
+        raise ValueError(f"Selection '{expression}' selects no frames from a batch of {batch_size}")
+    return tuple(indices)
+
+
+class SsnPrepSelectBatch:
+    """
+    A node that selects and reorders frames of an image batch with an index expression: comma-separated
+    terms, each an index ("3", "-1"), a slice ("0:10", "20:-1:2"), "all", "reverse" or "pingpong"
+    (the whole batch), or reverse(...) / pingpong(...) around an index or slice. Append "*count" to
+    repeat a term. Example: "0:10, 20:-1:2, reverse". An expression selects at most 65536 frames.
+    When the selection is an evenly spaced forward run, or a single frame repeated, the result is a view
+    of the input; otherwise it is gathered with one index_select. Enable contiguous to always copy.
+    """
+    def __init__(self):
+        pass
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "images": ("IMAGE", ),
+                "expression": ("STRING", {
+                    "default": "all",
+                }),
+            },
+            "optional": {
+                "contiguous": ("BOOLEAN", {"default": False}),
+            },
+        }
+
+    RETURN_TYPES = ("IMAGE", )
+    DESCRIPTION = cleandoc(__doc__)
+    FUNCTION = "execute"
+    CATEGORY = "smn/prep"
+
+    def execute(self, images: torch.Tensor, expression: str, contiguous: bool = False):
+        indices = resolve_expression(expression, images.shape[0])
+
+        first = indices[0]
+        step = indices[1] - first if len(indices) > 1 else 1
+        if all(index == first for index in indices):
+            # One frame repeated: broadcast it along the batch
+            result = images[first:first + 1].expand(len(indices), *images.shape[1:])
+        elif step > 0 and all(b - a == step for a, b in zip(indices, indices[1:])):
+            # Evenly spaced forward run: a strided view (tensors can't have negative strides, so
+            # reversed runs are gathered below)
+            result = images[first:indices[-1] + 1:step]
+        else:
+            index = torch.tensor(indices, dtype=torch.long, device=images.device)
+            result = images.index_select(0, index)
+
+        if contiguous:
+            result = result.contiguous()
+
+        return (result, )
@@ -1,13 +1,13 @@
 from inspect import cleandoc
-import numpy as np
 import torch  # type: ignore
-from ..util_convert import convert_np_array_to_tensor, convert_tensor_to_np_array
-import cv2
+import torch.nn.functional as F  # type: ignore
 
 class SsnPrepCrop:
     """
     A node that takes an image batch and adjusts the canvas size by either clipping or filling whitespace,
     while keeping the original content centered.
+    Works on the tensor directly, keeping its device and dtype: a pure crop returns a view of the
+    input (or one contiguous copy with contiguous enabled) and padding is a single batched pad.
     """
     def __init__(self):
         pass
@@ -23,6 +23,9 @@ class SsnPrepCrop:
                 "target_width": ("INT", {"widget": "int_field"}),
                 "target_height": ("INT", {"widget": "int_field"}),
             },
+            "optional": {
+                "contiguous": ("BOOLEAN", {"default": False}),
+            },
         }
 
     RETURN_TYPES = ("IMAGE", )
@@ -30,38 +33,34 @@ class SsnPrepCrop:
     FUNCTION = "execute"
     CATEGORY = "smn/prep"
 
-    def execute(self, images: torch.Tensor, target_width: int, target_height: int):
+    def execute(self, images: torch.Tensor, target_width: int, target_height: int, contiguous: bool = False):
         batch_size, height, width, channels = images.shape
         assert channels == 4, "Images must be RGBA"
 
-        result = torch.zeros((batch_size, target_height, target_width, 4), dtype=images.dtype)
-
-        for b in range(batch_size):
-            img_np = convert_tensor_to_np_array(images[b])
-
-            # Convert to RGBA if needed
-            if img_np.shape[2] == 3:
-                img_np = cv2.cvtColor(img_np, cv2.COLOR_RGB2RGBA)
-
-            h, w = img_np.shape[:2]
-            paste_x = (target_width - w) // 2
-            paste_y = (target_height - h) // 2
+        h, w = height, width
+        paste_x = (target_width - w) // 2
+        paste_y = (target_height - h) // 2
 
-            new_img = np.zeros((target_height, target_width, 4), dtype=np.uint8)
+        if paste_x >= 0 and paste_y >= 0:
+            # Image is smaller than target: center it with padding
+            region, top, left = images, paste_y, paste_x
+        else:
+            # Image is larger than target: center-crop it (the kept region is placed top-left)
+            start_x = max(0, -paste_x)
+            start_y = max(0, -paste_y)
+            end_x = min(w, target_width - paste_x)
+            end_y = min(h, target_height - paste_y)
 
-            if paste_x >= 0 and paste_y >= 0:
-                # Image is smaller than target: center it with padding
-                new_img[paste_y:paste_y + h, paste_x:paste_x + w, :] = img_np
-            else:
-                # Image is larger than target: center-crop it
-                start_x = max(0, -paste_x)
-                start_y = max(0, -paste_y)
-                end_x = min(w, target_width - paste_x)
-                end_y = min(h, target_height - paste_y)
+            region, top, left = images[:, start_y:end_y, start_x:end_x], 0, 0
 
-                crop = img_np[start_y:end_y, start_x:end_x]
-                new_img[:end_y - start_y, :end_x - start_x] = crop
+        bottom = target_height - top - region.shape[1]
+        right = target_width - left - region.shape[2]
 
-            result[b] = convert_np_array_to_tensor(new_img, images.dtype)
+        if top == bottom == left == right == 0:
+            # Pure crop: a strided view of the input
+            result = region.contiguous() if contiguous else region
+        else:
+            # Pad (H, W) with transparent black in one batched call
+            result = F.pad(region, (0, 0, left, right, top, bottom))
 
         return (result, )
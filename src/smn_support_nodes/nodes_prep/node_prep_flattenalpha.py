@@ -1,11 +1,12 @@
 from inspect import cleandoc
-import numpy as np
 import torch  # type: ignore
-from ..util_convert import convert_np_array_to_tensor, convert_tensor_to_np_array
 
 class SsnPrepFlattenAlpha:
     """
     A node that takes images with alpha and flattens them onto a background color, removing the alpha channel.
+    The batch is composited in one pass on its own device, without quantizing to 8 bits.
+    The result is the only allocation; the input is never written, since ComfyUI shares it with its
+    cache and every other node that reads it.
     """
     def __init__(self):
         pass
@@ -39,23 +40,12 @@ class SsnPrepFlattenAlpha:
         else:
             bg_rgb = background_color
 
-        result = torch.zeros((batch_size, height, width, 3), dtype=images.dtype)
+        # Composite the whole batch at once, on the input's device and dtype
+        bg = torch.tensor(bg_rgb, dtype=images.dtype, device=images.device) / 255.0
+        rgb = images[..., :3]
+        alpha = images[..., 3:4]
 
-        for b in range(batch_size):
-            img_np = convert_tensor_to_np_array(images[b])
-
-            if img_np.dtype != np.uint8:
-                img_np = (img_np * 255).astype(np.uint8)
-
-            rgb = img_np[:, :, :3].astype(np.float32)
-            alpha = img_np[:, :, 3:4].astype(np.float32) / 255.0
-
-            bg = np.ones_like(rgb) * np.array(bg_rgb, dtype=np.float32)
-
-            flattened = rgb * alpha + bg * (1 - alpha)
-            flattened = np.clip(flattened, 0, 255).astype(np.uint8)
-
-            result[b] = convert_np_array_to_tensor(flattened, images.dtype)
+        # rgb * alpha + bg * (1 - alpha); the background broadcasts without being materialized
+        result = torch.lerp(bg.expand_as(rgb), rgb, alpha).clamp_(0.0, 1.0)
 
         return (result, )
-
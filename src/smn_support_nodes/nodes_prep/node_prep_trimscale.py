@@ -2,13 +2,23 @@ from inspect import cleandoc
 import cv2
 import numpy as np
 import torch  # type: ignore
-from ..util_convert import convert_np_array_to_tensor, convert_tensor_to_np_array
+from ..util_convert import convert_np_batch_to_tensor, convert_tensor_batch_to_np_array
+from ..util_image import alpha_bboxes
+import os
 import random
+from concurrent.futures import ThreadPoolExecutor
 
 class SsnPrepTrimScale:
     """
     A node that takes an image, trims it to size, then scales each to the width or height of the image.
+    trim_mode "per_frame" trims every frame to its own bounds; "union" trims the whole batch to
+    the union of all bounds, and "window" to the union over trim_window frames centered on each
+    frame, which keeps animations from jittering.
     """
+
+    # Threads resizing frames of a group in parallel
+    RESIZE_WORKERS = os.cpu_count() or 1
+
     def __init__(self):
         pass
 
@@ -26,6 +36,10 @@ class SsnPrepTrimScale:
                 "target_height": ("INT", {"widget": "int_field"}),
                 "debug": ("BOOLEAN", {"widget": "checkbox"}),
             },
+            "optional": {
+                "trim_mode": (["per_frame", "union", "window"], {"default": "per_frame"}),
+                "trim_window": ("INT", {"default": 5, "min": 1, "max": 1024, "step": 1}),
+            },
         }
 
     RETURN_TYPES = ("IMAGE", )
@@ -33,31 +47,37 @@ class SsnPrepTrimScale:
     FUNCTION = "execute"
     CATEGORY = "smn/prep"
 
-    def execute(self, images: torch.Tensor, trim_padding: int, trim_threshold: int, target_width: int, target_height: int, debug: bool):
+    def execute(
+        self, images: torch.Tensor, trim_padding: int, trim_threshold: int, target_width: int, target_height: int,
+        debug: bool, trim_mode: str = "per_frame", trim_window: int = 5
+    ):
         batch_size, height, width, channels = images.shape
         assert channels == 4, "Images must be RGBA"
 
-        result = torch.zeros((batch_size, target_height, target_width, channels), dtype=images.dtype)
+        # Convert the whole batch to uint8 once; results are collected in one uint8 buffer
+        batch_np = convert_tensor_batch_to_np_array(images)
+        result_np = np.zeros((batch_size, target_height, target_width, channels), dtype=np.uint8)
 
+        # Trim boxes for the whole batch: the bounds of the pixels whose alpha is above the threshold,
+        # per frame or pooled over the batch / a window of frames
+        window = {"per_frame": 1, "union": 0, "window": trim_window}.get(trim_mode)
+        if window is None:
+            raise ValueError(f"Unknown trim_mode: {trim_mode}")
+        bboxes = alpha_bboxes(images[..., 3], trim_threshold, trim_padding, window).tolist()
+
+        # Frames that trim to the same size share the scaled size and paste offset, so they are
+        # resized as one group (a single group for the whole batch in union mode)
+        groups = {}
         for b in range(batch_size):
-            modified_image = convert_tensor_to_np_array(images[b])
+            modified_image = batch_np[b]
 
             # Convert to RGBA if not already
             if modified_image.shape[2] == 3:
                 modified_image = cv2.cvtColor(modified_image, cv2.COLOR_RGB2RGBA)
 
-            # Trim the image by checking from the outside in until we hit a non-alpha pixel
-            alpha_channel = modified_image[:, :, 3]
-            non_alpha_indices = np.where(alpha_channel > trim_threshold)
-
-            if non_alpha_indices[0].size > 0:
-                min_y = max(np.min(non_alpha_indices[0]) - trim_padding, 0)
-                max_y = min(np.max(non_alpha_indices[0]) + trim_padding, modified_image.shape[0])
-                min_x = max(np.min(non_alpha_indices[1]) - trim_padding, 0)
-                max_x = min(np.max(non_alpha_indices[1]) + trim_padding, modified_image.shape[1])
-                trimmed_image = modified_image[min_y:max_y, min_x:max_x]
-            else:
-                trimmed_image = modified_image
+            # Trim the image to its box
+            min_y, max_y, min_x, max_x = bboxes[b]
+            trimmed_image = modified_image[min_y:max_y, min_x:max_x]
 
             if debug:
                 # Fill the background with red
@@ -68,33 +88,41 @@ class SsnPrepTrimScale:
                 red_background[alpha_mask > 0] = trimmed_image[alpha_mask > 0]
                 trimmed_image = red_background
 
-            # Scale the trimmed image while maintaining the aspect ratio
-            aspect_ratio = trimmed_image.shape[1] / trimmed_image.shape[0]
-            new_width = target_width
-            new_height = int(new_width / aspect_ratio)
-            if new_height > target_height:
-                new_height = target_height
-                new_width = int(new_height * aspect_ratio)
-
-            scaled_image = cv2.resize(trimmed_image, (new_width, new_height), interpolation=cv2.INTER_AREA)
-
-            # Create a new image with the target dimensions and random background color
-            new_img = np.zeros((target_height, target_width, 4), dtype=np.uint8)
-            if debug:
+                # Fill the target frame with a random background color
                 random_color = [random.randint(0, 255) for _ in range(3)]
-                new_img[:, :, 0] = random_color[0]  # Red channel
-                new_img[:, :, 1] = random_color[1]  # Green channel
-                new_img[:, :, 2] = random_color[2]  # Blue channel
-                new_img[:, :, 3] = 255  # Alpha channel
-
-            # Calculate the position to paste the resized image to center it
-            paste_x = (target_width - new_width) // 2
-            paste_y = (target_height - new_height) // 2
-
-            # Paste the resized image onto the new image
-            new_img[paste_y:paste_y + new_height, paste_x:paste_x + new_width, :] = scaled_image
-
-            # Convert back to tensor and store in result
-            result[b] = convert_np_array_to_tensor(new_img, images.dtype)
+                result_np[b, :, :, 0] = random_color[0]  # Red channel
+                result_np[b, :, :, 1] = random_color[1]  # Green channel
+                result_np[b, :, :, 2] = random_color[2]  # Blue channel
+                result_np[b, :, :, 3] = 255  # Alpha channel
+
+            groups.setdefault(trimmed_image.shape[:2], []).append((b, trimmed_image))
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.RESIZE_WORKERS, batch_size))) as pool:
+            for (trim_height, trim_width), frames in groups.items():
+                # Scale the trimmed size while maintaining the aspect ratio
+                aspect_ratio = trim_width / trim_height
+                new_width = target_width
+                new_height = int(new_width / aspect_ratio)
+                if new_height > target_height:
+                    new_height = target_height
+                    new_width = int(new_height * aspect_ratio)
+
+                # Calculate the position to paste the resized image to center it
+                paste_x = (target_width - new_width) // 2
+                paste_y = (target_height - new_height) // 2
+
+                # Resize each frame straight into its slot in the result; cv2 releases the GIL
+                def resize_into(frame):
+                    b, trimmed_image = frame
+                    cv2.resize(
+                        trimmed_image, (new_width, new_height),
+                        dst=result_np[b, paste_y:paste_y + new_height, paste_x:paste_x + new_width],
+                        interpolation=cv2.INTER_AREA
+                    )
+
+                list(pool.map(resize_into, frames))
+
+        # Convert back to tensor in one pass
+        result = convert_np_batch_to_tensor(result_np, images.dtype)
 
         return (result, )
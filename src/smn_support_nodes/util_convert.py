@@ -46,7 +46,9 @@ def convert_3ch_tensor_to_4ch_tensor(image_tensor: torch.Tensor) -> torch.Tensor
     """
     try:
         if image_tensor.shape[-1] == 3:
-            alpha_channel = torch.ones((image_tensor.shape[0], image_tensor.shape[1], 1), dtype=image_tensor.dtype)
+            alpha_channel = torch.ones(
+                (image_tensor.shape[0], image_tensor.shape[1], 1), dtype=image_tensor.dtype, device=image_tensor.device
+            )
             image_tensor = torch.cat((image_tensor, alpha_channel), dim=-1)
         if image_tensor.shape[-1] != 4:
             raise ValueError("Conversion to 4-channel tensor failed")
@@ -61,7 +63,9 @@ def convert_3ch_batch_to_4ch_tbatch(tensor_batch: torch.Tensor) -> tuple:
     try:
         batch_size, height, width, channels = tensor_batch.shape
         if channels == 3:
-            alpha_channel = torch.ones((batch_size, height, width, 1), dtype=tensor_batch.dtype)
+            alpha_channel = torch.ones(
+                (batch_size, height, width, 1), dtype=tensor_batch.dtype, device=tensor_batch.device
+            )
             tensor_batch = torch.cat((tensor_batch, alpha_channel), dim=-1)
             channels = 4  # Update the channels count
         if tensor_batch.shape[-1] != 4:
@@ -80,3 +84,43 @@ def build_tensor_batch_from_nparray(image_np: np.ndarray) -> torch.Tensor:
         return image_tensor_batch
     except Exception as e:
         raise RuntimeError(f"Error building tensor batch from NumPy array: {e}")
+
+def convert_tensor_batch_to_np_array(images: torch.Tensor, out: np.ndarray = None) -> np.ndarray:
+    """
+    Convert a whole image batch (float in [0,1], or integer) to a contiguous uint8 NumPy array.
+    Clamp, scale and cast run on the tensor's device and the batch crosses to the host in one copy.
+    Pass `out`, a contiguous uint8 array of the same shape, to write into a preallocated buffer.
+    """
+    try:
+        batch = images.detach()
+        if batch.dtype.is_floating_point:
+            batch = batch.clamp(0, 1).mul_(255)
+        if out is not None:
+            if out.shape != tuple(batch.shape) or out.dtype != np.uint8:
+                raise ValueError(f"Output buffer must be uint8 with shape {tuple(batch.shape)}, got {out.dtype} {out.shape}")
+            if batch.device.type != "cpu":
+                # Cast before the copy so only uint8 data crosses to the host
+                batch = batch.to(torch.uint8)
+            torch.from_numpy(out).copy_(batch)
+            return out
+        return batch.to(device="cpu", dtype=torch.uint8).contiguous().numpy()
+    except Exception as e:
+        raise RuntimeError(f"Error converting tensor batch to NumPy array: {e}")
+
+def convert_np_batch_to_tensor(images_np: np.ndarray, dtype, device=None, out: torch.Tensor = None) -> torch.Tensor:
+    """
+    Convert a uint8 NumPy image batch to a tensor in [0,1] with one host-to-device copy.
+    Pass `out`, a tensor of the same shape, to write into a preallocated buffer.
+    """
+    try:
+        batch = torch.from_numpy(np.ascontiguousarray(images_np))
+        if out is not None:
+            if tuple(out.shape) != tuple(batch.shape):
+                raise ValueError(f"Output tensor must have shape {tuple(batch.shape)}, got {tuple(out.shape)}")
+            if out.dtype == torch.float32:
+                return out.copy_(batch).div_(255)
+            return out.copy_(batch.to(device=out.device, dtype=torch.float32).div_(255))
+        tensor_batch = batch.to(device=device, dtype=torch.float32).div_(255)
+        return tensor_batch if dtype == torch.float32 else tensor_batch.to(dtype)
+    except Exception as e:
+        raise RuntimeError(f"Error converting NumPy batch to tensor: {e}")
@@ -0,0 +1,151 @@
+import itertools
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+# Jobs waiting to run; submitting blocks once this many are queued
+MAX_PENDING_JOBS = 8
+
+# Finished jobs kept around for status queries before the oldest are dropped
+MAX_TRACKED_JOBS = 256
+
+_queue: "queue.Queue" = queue.Queue(maxsize=MAX_PENDING_JOBS)
+_jobs: "OrderedDict[str, dict]" = OrderedDict()
+_jobs_lock = threading.Lock()
+_workers: list = []
+_workers_lock = threading.Lock()
+# Held while a job claims its label and is queued, so jobs reach the queue in claim order
+_submit_lock = threading.Lock()
+_job_counter = itertools.count(1)
+# Per label (the output file), set when the last job claiming it finishes
+_label_tails: Dict[str, threading.Event] = {}
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _update_job(job_id: str, **fields) -> None:
+    with _jobs_lock:
+        if job_id in _jobs:
+            _jobs[job_id].update(fields)
+
+
+def _claim_label(label: str) -> Tuple[Optional[threading.Event], threading.Event]:
+    """
+    Take the next turn on `label`: returns the event of the previous holder (to wait for) and this
+    holder's own (to set when done). Call with _jobs_lock held.
+    """
+    done = threading.Event()
+    previous = _label_tails.get(label)
+    _label_tails[label] = done
+    return previous, done
+
+
+def _release_label(label: str, done: threading.Event) -> None:
+    with _jobs_lock:
+        if _label_tails.get(label) is done:
+            del _label_tails[label]
+    done.set()
+
+
+@contextmanager
+def label_turn(label: str) -> Iterator[None]:
+    """
+    Run a block in turn with the jobs submitted under `label`: after every one already submitted,
+    and before any submitted later.
+    """
+    with _jobs_lock:
+        previous, done = _claim_label(label)
+    try:
+        if previous is not None:
+            previous.wait()
+        yield
+    finally:
+        _release_label(label, done)
+
+
+def _worker_loop() -> None:
+    while True:
+        job_id, job_fn, label, previous, done = _queue.get()
+        if previous is not None:
+            previous.wait()
+        _update_job(job_id, status="running", started=_now())
+        try:
+            ok, log = job_fn()
+            status = "done" if ok else "failed"
+        except Exception as e:
+            log = f"Error in background job {job_id}: {e}\n"
+            status = "failed"
+        _update_job(job_id, status=status, finished=_now(), log=log)
+        _release_label(label, done)
+        _queue.task_done()
+
+
+def ensure_workers(count: int) -> int:
+    """
+    Make sure at least `count` worker threads are running. Workers are never stopped,
+    so the pool only grows. Returns the current worker count.
+    """
+    with _workers_lock:
+        while len(_workers) < count:
+            worker = threading.Thread(
+                target=_worker_loop, name=f"ssn-encode-{len(_workers)}", daemon=True
+            )
+            worker.start()
+            _workers.append(worker)
+        return len(_workers)
+
+
+def submit_encode_job(label: str, job_fn: Callable[[], Tuple[bool, str]], workers: int = 1) -> str:
+    """
+    Queue `job_fn` to run on a background worker and return its job id.
+    `job_fn` returns (success, log). Blocks while MAX_PENDING_JOBS jobs are already waiting.
+    Jobs with the same label (the output file) run one at a time, in the order they were submitted,
+    however many workers there are.
+    """
+    ensure_workers(max(1, workers))
+
+    job_id = f"job-{next(_job_counter):04d}-{uuid.uuid4().hex[:8]}"
+    with _jobs_lock:
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "label": label,
+            "status": "queued",
+            "submitted": _now(),
+            "started": None,
+            "finished": None,
+            "log": "",
+        }
+        # Drop the oldest finished jobs once we track too many
+        for old_id in list(_jobs):
+            if len(_jobs) <= MAX_TRACKED_JOBS:
+                break
+            if _jobs[old_id]["status"] in ("done", "failed"):
+                del _jobs[old_id]
+
+    with _submit_lock:
+        with _jobs_lock:
+            previous, done = _claim_label(label)
+        _queue.put((job_id, job_fn, label, previous, done))
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """
+    Return a snapshot of the job record, or None if the id is unknown (or already dropped).
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+
+def pending_jobs() -> int:
+    """
+    Number of jobs waiting for a worker.
+    """
+    return _queue.qsize()
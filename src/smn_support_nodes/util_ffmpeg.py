@@ -0,0 +1,133 @@
+import shutil
+import subprocess
+import threading
+from typing import FrozenSet, List, NamedTuple, Optional
+
+# Seconds allowed for each probe invocation of the ffmpeg binary
+PROBE_TIMEOUT = 30
+
+
+class FfmpegInfo(NamedTuple):
+    exe: Optional[str]
+    version: str
+    encoders: FrozenSet[str]
+    pix_fmts: FrozenSet[str]
+    error: Optional[str]
+
+
+def _resolve_exe() -> Optional[str]:
+    """
+    Prefer an ffmpeg on PATH, then the binary shipped with imageio-ffmpeg.
+    """
+    exe = shutil.which("ffmpeg")
+    if exe:
+        return exe
+    try:
+        import imageio_ffmpeg  # type: ignore
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def _run(exe: str, *args: str) -> str:
+    result = subprocess.run(
+        [exe, "-hide_banner", *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        check=False,
+        timeout=PROBE_TIMEOUT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"'{exe} {' '.join(args)}' exited with code {result.returncode}")
+    return result.stdout
+
+
+def _parse_listing(text: str) -> FrozenSet[str]:
+    """
+    Names from an `-encoders` / `-pix_fmts` listing: rows look like " V....D libvpx-vp9  ...",
+    after a legend that ends with a "-----" separator line.
+    """
+    names = set()
+    in_list = False
+    for line in text.splitlines():
+        parts = line.split()
+        if not in_list:
+            in_list = bool(parts) and set(parts[0]) == {"-"}
+            continue
+        if len(parts) >= 2:
+            names.add(parts[1])
+    return frozenset(names)
+
+
+def _probe() -> FfmpegInfo:
+    exe = _resolve_exe()
+    if exe is None:
+        return FfmpegInfo(None, "", frozenset(), frozenset(),
+                          "ffmpeg not found on PATH and imageio-ffmpeg provides no binary")
+    try:
+        version_lines: List[str] = _run(exe, "-version").splitlines()
+        return FfmpegInfo(
+            exe,
+            version_lines[0].split(" Copyright")[0].strip() if version_lines else "",
+            _parse_listing(_run(exe, "-encoders")),
+            _parse_listing(_run(exe, "-pix_fmts")),
+            None
+        )
+    except (OSError, subprocess.SubprocessError, RuntimeError) as e:
+        return FfmpegInfo(None, "", frozenset(), frozenset(), f"ffmpeg probe failed ({exe}): {e}")
+
+
+_info: Optional[FfmpegInfo] = None
+
+
+def _probe_in_background() -> None:
+    global _info
+    _info = _probe()
+
+
+# Probe while the rest of ComfyUI starts up, so the first node run doesn't pay for it
+_probe_thread = threading.Thread(target=_probe_in_background, name="ffmpeg-probe", daemon=True)
+_probe_thread.start()
+
+
+def get_ffmpeg_info() -> FfmpegInfo:
+    """
+    Return the resolved ffmpeg binary and its capabilities, waiting for the startup probe if needed.
+    """
+    _probe_thread.join()
+    return _info
+
+
+def get_ffmpeg_exe() -> str:
+    """
+    Path of the ffmpeg binary to run. Raises RuntimeError if none could be resolved.
+    """
+    info = get_ffmpeg_info()
+    if info.exe is None:
+        raise RuntimeError(info.error)
+    return info.exe
+
+
+def get_available_encoders() -> Optional[FrozenSet[str]]:
+    """
+    Return the names of the encoders the ffmpeg binary supports, or None if it could not be probed.
+    """
+    info = get_ffmpeg_info()
+    return info.encoders if info.exe is not None else None
+
+
+def has_encoder(name: str) -> bool:
+    """
+    True if ffmpeg supports encoder `name`, or if the encoders could not be probed.
+    """
+    encoders = get_available_encoders()
+    return encoders is None or name in encoders
+
+
+def has_pix_fmt(name: str) -> bool:
+    """
+    True if ffmpeg knows pixel format `name`, or if the pixel formats could not be probed.
+    """
+    info = get_ffmpeg_info()
+    return info.exe is None or name in info.pix_fmts
@@ -0,0 +1,104 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from PIL import ImageFont  # type: ignore
+
+# Fonts shipped with the node pack
+FONT_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "resources/fonts"))
+
+# Loaded fonts kept in memory; least recently used ones are dropped beyond this
+FONT_CACHE_SIZE = 64
+
+# Comma-separated sizes to pre-load every bundled font at, on a background thread at startup
+PREWARM_ENV = "SSN_FONT_PREWARM_SIZES"
+
+_fonts: "OrderedDict[tuple, ImageFont.ImageFont]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_lock = threading.Lock()
+
+
+def get_font_cache_stats() -> dict:
+    """
+    Return a snapshot of the process-wide hit/miss/eviction counters and the current entry count.
+    """
+    with _lock:
+        return dict(_stats, entries=len(_fonts))
+
+
+def format_font_cache_stats() -> str:
+    """
+    Render the counters as a short log-friendly string.
+    """
+    stats = get_font_cache_stats()
+    lookups = stats["hits"] + stats["misses"]
+    rate = (100.0 * stats["hits"] / lookups) if lookups else 0.0
+    return (
+        f"hits={stats['hits']} misses={stats['misses']} ({rate:.1f}% hit rate), "
+        f"evictions={stats['evictions']}, entries={stats['entries']}"
+    )
+
+
+def get_font(path: Optional[str], size: int, layout_engine: Optional[int] = None) -> "ImageFont.ImageFont":
+    """
+    Return the font at `path` (None for PIL's default font) loaded at `size`, parsing the file only
+    the first time a (resolved path, size, layout engine) combination is requested.
+    """
+    key = (os.path.realpath(path) if path else None, size, layout_engine)
+    with _lock:
+        font = _fonts.get(key)
+        if font is not None:
+            _fonts.move_to_end(key)
+            _stats["hits"] += 1
+            return font
+
+    # Parse outside the lock; a concurrent miss on the same key just loads it twice
+    if path:
+        font = ImageFont.truetype(key[0], size, layout_engine=layout_engine)
+    else:
+        font = ImageFont.load_default()
+
+    with _lock:
+        _stats["misses"] += 1
+        _fonts[key] = font
+        _fonts.move_to_end(key)
+        while len(_fonts) > FONT_CACHE_SIZE:
+            _fonts.popitem(last=False)
+            _stats["evictions"] += 1
+    return font
+
+
+def prewarm_fonts(sizes: Iterable[int], font_dir: str = FONT_DIR) -> int:
+    """
+    Load every .ttf in `font_dir` at each of `sizes` into the cache. Returns the number of fonts loaded;
+    files that fail to load are skipped.
+    """
+    if not os.path.isdir(font_dir):
+        return 0
+    loaded = 0
+    for name in sorted(os.listdir(font_dir)):
+        if not name.endswith(".ttf"):
+            continue
+        for size in sizes:
+            try:
+                get_font(os.path.join(font_dir, name), size)
+                loaded += 1
+            except OSError:
+                continue
+    return loaded
+
+
+def _prewarm_from_env() -> None:
+    value = os.environ.get(PREWARM_ENV, "").strip()
+    if not value:
+        return
+    try:
+        sizes = [int(size) for size in value.split(",") if size.strip()]
+    except ValueError:
+        print(f"[SSN] Ignoring {PREWARM_ENV}={value!r}: expected comma-separated integer sizes")
+        return
+    threading.Thread(target=prewarm_fonts, args=(sizes,), name="font-prewarm", daemon=True).start()
+
+
+_prewarm_from_env()
@@ -0,0 +1,298 @@
+import bisect
+import json
+import os
+import struct
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .util_font_cache import FONT_DIR
+
+# Index of the bundled fonts, kept next to (not inside) the fonts directory so writing it doesn't
+# change the directory's mtime
+CATALOG_FILE = os.path.join(os.path.dirname(FONT_DIR), "font_catalog.json")
+CATALOG_VERSION = 1
+
+# name table IDs: typographic family/subfamily take precedence over the legacy ones
+_FAMILY_IDS = (16, 1)
+_STYLE_IDS = (17, 2)
+_ENGLISH_US = 0x409
+
+
+class FontEntry(NamedTuple):
+    name: str  # file name in the fonts directory
+    size: int
+    mtime_ns: int
+    family: str
+    style: str
+    ranges: Optional[Tuple[Tuple[int, int], ...]]  # inclusive codepoint ranges, None if the cmap is unreadable
+
+    def supports(self, codepoint: int) -> bool:
+        if self.ranges is None:
+            return True
+        i = bisect.bisect_right(self.ranges, (codepoint, 0x10FFFF + 1)) - 1
+        return i >= 0 and self.ranges[i][0] <= codepoint <= self.ranges[i][1]
+
+
+def _tables(data: bytes) -> Dict[bytes, Tuple[int, int]]:
+    if data[:4] not in (b"\x00\x01\x00\x00", b"true", b"OTTO"):
+        raise ValueError("Not a TrueType/OpenType font")
+    (count, ) = struct.unpack_from(">H", data, 4)
+    tables = {}
+    for i in range(count):
+        tag, _, offset, length = struct.unpack_from(">4sIII", data, 12 + 16 * i)
+        tables[tag] = (offset, length)
+    return tables
+
+
+def _parse_names(data: bytes, offset: int) -> Tuple[str, str]:
+    _, count, strings = struct.unpack_from(">HHH", data, offset)
+    found = {}
+    for i in range(count):
+        platform, encoding, language, name_id, length, string_offset = struct.unpack_from(
+            ">HHHHHH", data, offset + 6 + 12 * i
+        )
+        if name_id not in _FAMILY_IDS + _STYLE_IDS:
+            continue
+        raw = data[offset + strings + string_offset:offset + strings + string_offset + length]
+        if platform in (0, 3):
+            value = raw.decode("utf-16-be", "replace")
+            rank = 0 if platform == 3 and language == _ENGLISH_US else 1
+        elif platform == 1 and encoding == 0:
+            value = raw.decode("mac_roman", "replace")
+            rank = 2
+        else:
+            continue
+        if name_id not in found or rank < found[name_id][0]:
+            found[name_id] = (rank, value)
+
+    def pick(ids):
+        return next((found[i][1] for i in ids if i in found), "")
+
+    return pick(_FAMILY_IDS), pick(_STYLE_IDS)
+
+
+def _format4_codepoints(data: bytes, offset: int) -> np.ndarray:
+    (seg_x2, ) = struct.unpack_from(">H", data, offset + 6)
+    segments = seg_x2 // 2
+    ends = np.frombuffer(data, ">u2", segments, offset + 14).astype(np.int64)
+    starts = np.frombuffer(data, ">u2", segments, offset + 16 + seg_x2).astype(np.int64)
+    deltas = np.frombuffer(data, ">u2", segments, offset + 16 + 2 * seg_x2).astype(np.int64)
+    range_offsets_at = offset + 16 + 3 * seg_x2
+    range_offsets = np.frombuffer(data, ">u2", segments, range_offsets_at).astype(np.int64)
+
+    raw = np.frombuffer(data, np.uint8)
+    codepoints = []
+    for i in range(segments):
+        if starts[i] > ends[i] or starts[i] == 0xFFFF:
+            continue
+        codes = np.arange(starts[i], ends[i] + 1)
+        if range_offsets[i] == 0:
+            glyphs = (codes + deltas[i]) & 0xFFFF
+        else:
+            # Glyph ids come from the glyph array, addressed relative to this segment's idRangeOffset
+            at = range_offsets_at + 2 * i + range_offsets[i] + 2 * (codes - starts[i])
+            at = at[at + 2 <= len(data)]
+            codes = codes[:len(at)]
+            glyphs = (raw[at].astype(np.int64) << 8) | raw[at + 1]
+            glyphs = np.where(glyphs != 0, (glyphs + deltas[i]) & 0xFFFF, 0)
+        codepoints.append(codes[glyphs != 0])
+    return np.concatenate(codepoints) if codepoints else np.zeros(0, dtype=np.int64)
+
+
+def _format12_ranges(data: bytes, offset: int) -> List[Tuple[int, int]]:
+    (groups, ) = struct.unpack_from(">I", data, offset + 12)
+    ranges = []
+    for start, end, glyph in struct.iter_unpack(">III", data[offset + 16:offset + 16 + 12 * groups]):
+        if glyph == 0:
+            start += 1
+        if start <= end:
+            ranges.append((start, end))
+    return ranges
+
+
+def _merge_ranges(ranges: Iterable[Tuple[int, int]]) -> Tuple[Tuple[int, int], ...]:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return tuple((start, end) for start, end in merged)
+
+
+def _parse_cmap(data: bytes, offset: int) -> Optional[Tuple[Tuple[int, int], ...]]:
+    _, count = struct.unpack_from(">HH", data, offset)
+    subtables = {}
+    for i in range(count):
+        platform, encoding, sub_offset = struct.unpack_from(">HHI", data, offset + 4 + 8 * i)
+        (fmt, ) = struct.unpack_from(">H", data, offset + sub_offset)
+        subtables.setdefault(fmt, []).append(((platform, encoding), offset + sub_offset))
+
+    # Unicode subtables, full repertoire (format 12) first, then the BMP (format 4)
+    unicode = {(3, 10), (0, 4), (0, 6), (3, 1), (0, 3), (0, 0), (0, 1), (0, 2), (3, 0)}
+    for fmt, (platform_encoding, sub_offset) in (
+        (fmt, table) for fmt in (12, 4) for table in subtables.get(fmt, ()) if table[0] in unicode
+    ):
+        if fmt == 12:
+            return _merge_ranges(_format12_ranges(data, sub_offset))
+        codepoints = np.unique(_format4_codepoints(data, sub_offset))
+        if not len(codepoints):
+            return ()
+        breaks = np.flatnonzero(np.diff(codepoints) != 1)
+        starts = np.concatenate(([codepoints[0]], codepoints[breaks + 1]))
+        ends = np.concatenate((codepoints[breaks], [codepoints[-1]]))
+        return tuple(zip(starts.tolist(), ends.tolist()))
+    return None
+
+
+def read_font_metadata(path: str) -> Tuple[str, str, Optional[Tuple[Tuple[int, int], ...]]]:
+    """
+    Read the family and style names and the supported codepoint ranges of a TrueType/OpenType
+    file, straight from its name and cmap tables (the font is not loaded).
+    """
+    with open(path, "rb") as handle:
+        data = handle.read()
+    tables = _tables(data)
+    family, style = _parse_names(data, tables[b"name"][0]) if b"name" in tables else ("", "")
+    ranges = _parse_cmap(data, tables[b"cmap"][0]) if b"cmap" in tables else None
+    if not family:
+        family = os.path.splitext(os.path.basename(path))[0]
+    return family, style, ranges
+
+
+class FontCatalog:
+    """
+    An index of the .ttf files in a fonts directory, with their size, mtime, family/style names and
+    supported codepoints, persisted to a JSON file. The directory is only rescanned when its mtime
+    changes, and files whose size and mtime are unchanged keep their parsed metadata.
+    """
+    def __init__(self, font_dir: str = FONT_DIR, catalog_file: Optional[str] = CATALOG_FILE):
+        self.font_dir = font_dir
+        self.catalog_file = catalog_file
+        self._dir_mtime_ns = None
+        self._entries: Dict[str, FontEntry] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.catalog_file or not os.path.exists(self.catalog_file):
+            return
+        try:
+            with open(self.catalog_file, "r", encoding="utf-8") as handle:
+                stored = json.load(handle)
+            if stored.get("version") != CATALOG_VERSION or stored.get("font_dir") != self.font_dir:
+                return
+            self._entries = {
+                name: FontEntry(
+                    name, font["size"], font["mtime_ns"], font["family"], font["style"],
+                    None if font["ranges"] is None else tuple(tuple(r) for r in font["ranges"])
+                )
+                for name, font in stored["fonts"].items()
+            }
+            self._dir_mtime_ns = stored["dir_mtime_ns"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[SSN] Ignoring unreadable font catalog {self.catalog_file}: {e}")
+            self._entries = {}
+            self._dir_mtime_ns = None
+
+    def _save(self) -> None:
+        if not self.catalog_file:
+            return
+        stored = {
+            "version": CATALOG_VERSION,
+            "font_dir": self.font_dir,
+            "dir_mtime_ns": self._dir_mtime_ns,
+            "fonts": {
+                entry.name: {
+                    "size": entry.size, "mtime_ns": entry.mtime_ns, "family": entry.family,
+                    "style": entry.style, "ranges": entry.ranges,
+                }
+                for entry in self._entries.values()
+            },
+        }
+        tmp = f"{self.catalog_file}.tmp{threading.get_ident()}"
+        try:
+            with open(tmp, "w", encoding="utf-8") as handle:
+                json.dump(stored, handle, separators=(",", ":"))
+            os.replace(tmp, self.catalog_file)
+        except OSError:
+            # A read-only install just keeps the index in memory
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def refresh(self) -> None:
+        """
+        Rescan the directory if its mtime changed since the last scan.
+        """
+        try:
+            dir_mtime_ns = os.stat(self.font_dir).st_mtime_ns
+        except OSError:
+            dir_mtime_ns = None
+        with self._lock:
+            if dir_mtime_ns == self._dir_mtime_ns:
+                return
+            entries = {}
+            if dir_mtime_ns is not None:
+                for name in sorted(os.listdir(self.font_dir)):
+                    if not name.endswith(".ttf"):
+                        continue
+                    path = os.path.join(self.font_dir, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entry = self._entries.get(name)
+                    if entry is None or (entry.size, entry.mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                        try:
+                            family, style, ranges = read_font_metadata(path)
+                        except (OSError, ValueError, KeyError, struct.error) as e:
+                            print(f"[SSN] Font {name} metadata unreadable: {e}")
+                            family, style, ranges = os.path.splitext(name)[0], "", None
+                        entry = FontEntry(name, stat.st_size, stat.st_mtime_ns, family, style, ranges)
+                    entries[name] = entry
+            self._entries = entries
+            self._dir_mtime_ns = dir_mtime_ns
+            self._save()
+
+    def font_names(self) -> List[str]:
+        """
+        Return the indexed font file names, sorted.
+        """
+        self.refresh()
+        return sorted(self._entries)
+
+    def get(self, name: str) -> Optional[FontEntry]:
+        self.refresh()
+        return self._entries.get(name)
+
+    def missing_glyphs(self, name: str, text: str) -> List[str]:
+        """
+        Return the distinct characters of `text` the font has no glyph for, in order of appearance.
+        Control characters (line breaks, tabs) are not checked; unknown fonts report nothing.
+        """
+        entry = self.get(name)
+        if entry is None or entry.ranges is None:
+            return []
+        missing = []
+        for char in dict.fromkeys(text):
+            if unicodedata.category(char) != "Cc" and not entry.supports(ord(char)):
+                missing.append(char)
+        return missing
+
+
+_catalog: Optional[FontCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_font_catalog() -> FontCatalog:
+    """
+    Return the process-wide catalog of the bundled fonts directory.
+    """
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = FontCatalog()
+        return _catalog
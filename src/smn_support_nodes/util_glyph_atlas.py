@@ -0,0 +1,132 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .util_font_cache import FONT_CACHE_SIZE, get_font
+
+
+class Glyph(NamedTuple):
+    mask: np.ndarray  # H×W uint8 coverage
+    left: int  # bitmap offset from the pen position
+    top: int  # bitmap offset from the line's ascender
+    advance: float
+
+
+class TextLayout(NamedTuple):
+    placements: List[Tuple[int, Glyph]]  # (x offset from the origin, glyph), visible glyphs only
+    width: float  # advance width, as ImageDraw.textlength
+    top: int  # as the top of ImageDraw.textbbox at (0, 0)
+    height: int  # as the height of ImageDraw.textbbox
+    ink_box: Optional[Tuple[int, int, int, int]]  # (x0, y0, x1, y1) of the covered pixels, None if blank
+
+
+class GlyphAtlas:
+    """
+    The glyphs of one font, each rasterized once, and the kerning between glyph pairs.
+    Text is assembled by blitting the cached glyph masks at their pen positions, which reproduces
+    ImageDraw.text for single-line text drawn at an integer origin.
+    Lookups are not locked: a concurrent miss on the same glyph just rasterizes it twice.
+    """
+    def __init__(self, font):
+        self.font = font
+        self._glyphs = {}
+        self._kerning = {}
+
+    def glyph(self, char: str) -> Glyph:
+        glyph = self._glyphs.get(char)
+        if glyph is None:
+            mask = self.font.getmask(char, "L")
+            width, height = mask.size
+            left, top = self.font.getbbox(char)[:2]
+            glyph = Glyph(
+                np.frombuffer(bytes(mask), dtype=np.uint8).reshape(height, width),
+                int(left), int(top), self.font.getlength(char)
+            )
+            self._glyphs[char] = glyph
+        return glyph
+
+    def kerning(self, prev: str, char: str) -> float:
+        pair = prev + char
+        kerning = self._kerning.get(pair)
+        if kerning is None:
+            kerning = self.font.getlength(pair) - self.glyph(prev).advance - self.glyph(char).advance
+            self._kerning[pair] = kerning
+        return kerning
+
+    def layout(self, text: str) -> TextLayout:
+        placements = []
+        pen = 0.0
+        top = bottom = None
+        x0 = y0 = x1 = y1 = None
+        prev = None
+        for char in text:
+            if prev is not None:
+                pen += self.kerning(prev, char)
+            glyph = self.glyph(char)
+            height, width = glyph.mask.shape
+            top = glyph.top if top is None else min(top, glyph.top)
+            bottom = glyph.top + height if bottom is None else max(bottom, glyph.top + height)
+            if width and height:
+                x = int(round(pen))
+                placements.append((x, glyph))
+                gx0, gy0 = x + glyph.left, glyph.top
+                x0 = gx0 if x0 is None else min(x0, gx0)
+                y0 = gy0 if y0 is None else min(y0, gy0)
+                x1 = gx0 + width if x1 is None else max(x1, gx0 + width)
+                y1 = gy0 + height if y1 is None else max(y1, gy0 + height)
+            pen += glyph.advance
+            prev = char
+
+        return TextLayout(
+            placements, pen, top if text else 0, (bottom - top) if text else 0,
+            (x0, y0, x1, y1) if placements else None
+        )
+
+    @staticmethod
+    def blit(layout: TextLayout, canvas: np.ndarray, x: int, y: int) -> None:
+        """
+        Draw a laid out text into an H×W uint8 `canvas` with its origin at (x, y), clipped to the
+        canvas. Overlapping glyphs are combined "source over", with the same integer rounding as PIL.
+        """
+        canvas_height, canvas_width = canvas.shape
+        for offset, glyph in layout.placements:
+            gx = x + offset + glyph.left
+            gy = y + glyph.top
+            height, width = glyph.mask.shape
+            cx0, cy0 = max(gx, 0), max(gy, 0)
+            cx1, cy1 = min(gx + width, canvas_width), min(gy + height, canvas_height)
+            if cx0 >= cx1 or cy0 >= cy1:
+                continue
+            target = canvas[cy0:cy1, cx0:cx1]
+            source = glyph.mask[cy0 - gy:cy1 - gy, cx0 - gx:cx1 - gx]
+            # source + target * (255 - source) / 255, rounded as PIL's MULDIV255
+            tmp = target.astype(np.uint16) * (255 - source) + 128
+            target[...] = source + (((tmp >> 8) + tmp) >> 8)
+
+
+_atlases: "OrderedDict[tuple, GlyphAtlas]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_glyph_atlas(path: Optional[str], size: int, layout_engine: Optional[int] = None) -> GlyphAtlas:
+    """
+    Return the process-wide glyph atlas for the font at `path` (None for PIL's default font) and `size`,
+    keeping as many atlases as the font cache keeps fonts.
+    """
+    key = (os.path.realpath(path) if path else None, size, layout_engine)
+    with _lock:
+        atlas = _atlases.get(key)
+        if atlas is not None:
+            _atlases.move_to_end(key)
+            return atlas
+
+    atlas = GlyphAtlas(get_font(path, size, layout_engine))
+    with _lock:
+        atlas = _atlases.setdefault(key, atlas)
+        _atlases.move_to_end(key)
+        while len(_atlases) > FONT_CACHE_SIZE:
+            _atlases.popitem(last=False)
+    return atlas
@@ -0,0 +1,64 @@
+import torch  # type: ignore
+
+
+def _window_any(occupancy: torch.Tensor, window: int) -> torch.Tensor:
+    """
+    For a B×N occupancy mask, mark what is occupied in any frame of a window of `window` frames
+    centered on each frame. A window of 0 or less spans the whole batch.
+    """
+    if window <= 0:
+        return occupancy.any(dim=0, keepdim=True).expand_as(occupancy)
+    if window == 1:
+        return occupancy
+    n = occupancy.shape[1]
+    padded = torch.cat((
+        occupancy.new_zeros(((window - 1) // 2, n)),
+        occupancy,
+        occupancy.new_zeros((window // 2, n)),
+    ))
+    return padded.unfold(0, window, 1).any(dim=-1)
+
+
+def alpha_bboxes(alpha: torch.Tensor, threshold: int, padding: int = 0, window: int = 1) -> torch.Tensor:
+    """
+    Find the padded bounding box of the opaque pixels of every frame in a B×H×W alpha batch
+    (float in [0,1]), on the batch's device. A pixel counts when its 8-bit alpha is above `threshold`.
+    Returns a B×4 int64 tensor of (min_y, max_y, min_x, max_x) slice bounds, clamped to the frame;
+    frames with no opaque pixel get the whole frame.
+    With `window` > 1 each box covers the frames in a window of that many frames centered on it,
+    and with `window` <= 0 every frame gets the union box of the whole batch.
+    Matches the original per-frame trim: the max bounds are the last opaque row/column plus
+    `padding`, used as exclusive slice ends.
+    """
+    _, height, width = alpha.shape
+
+    # Row/column occupancy from two max reductions over the whole batch. uint8(a * 255) > threshold
+    # is a * 255 >= threshold + 1, and scaling is monotonic, so only the maxima need comparing
+    alpha = alpha.detach()
+    row_max = alpha.amax(dim=2)
+    col_max = alpha.amax(dim=1)
+    if alpha.dtype.is_floating_point:
+        rows = row_max.clamp(0, 1).mul_(255) >= threshold + 1
+        cols = col_max.clamp(0, 1).mul_(255) >= threshold + 1
+    else:
+        rows = row_max > threshold
+        cols = col_max > threshold
+    rows = _window_any(rows, window)
+    cols = _window_any(cols, window)
+
+    # First and last occupied index along each axis (argmax returns the first maximum)
+    min_y = rows.to(torch.uint8).argmax(dim=1)
+    max_y = height - 1 - rows.flip(1).to(torch.uint8).argmax(dim=1)
+    min_x = cols.to(torch.uint8).argmax(dim=1)
+    max_x = width - 1 - cols.flip(1).to(torch.uint8).argmax(dim=1)
+
+    bboxes = torch.stack((
+        (min_y - padding).clamp(min=0),
+        (max_y + padding).clamp(max=height),
+        (min_x - padding).clamp(min=0),
+        (max_x + padding).clamp(max=width),
+    ), dim=1)
+
+    full = torch.tensor([0, height, 0, width], dtype=bboxes.dtype, device=bboxes.device)
+    empty = ~rows.any(dim=1)
+    return torch.where(empty.unsqueeze(1), full, bboxes)
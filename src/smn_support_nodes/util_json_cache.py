@@ -0,0 +1,121 @@
+import json
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Tuple
+
+# Estimated memory the cached documents (parsed values plus their source strings) may use;
+# least recently used documents are dropped beyond it
+JSON_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Parsed Python objects take roughly this many times the size of their JSON text
+PARSED_SIZE_FACTOR = 8
+
+_documents: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+_lock = threading.Lock()
+
+
+def _immutable(*_args, **_kwargs):
+    raise TypeError("Cached JSON documents are read-only")
+
+
+class FrozenDict(dict):
+    """
+    A JSON object from the parse cache. Reads like a dict (and serializes like one); writes raise
+    TypeError, since the same object is shared by every reader of the document.
+    """
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        # Copies and pickles are plain, writable dicts
+        return (dict, (dict(self), ))
+
+
+class FrozenList(list):
+    """
+    A JSON array from the parse cache. Reads like a list (and serializes like one); writes raise
+    TypeError, since the same object is shared by every reader of the document.
+    """
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = clear = extend = insert = pop = remove = reverse = sort = _immutable
+
+    def __reduce__(self):
+        return (list, (list(self), ))
+
+
+def _freeze_list(items: list) -> FrozenList:
+    return FrozenList([_freeze_list(item) if type(item) is list else item for item in items])
+
+
+def _frozen_object(pairs: list) -> FrozenDict:
+    # Called by the decoder bottom-up, so nested objects are already frozen; arrays are frozen here
+    return FrozenDict([(key, _freeze_list(value) if type(value) is list else value) for key, value in pairs])
+
+
+def get_json_cache_stats() -> dict:
+    """
+    Return a snapshot of the process-wide hit/miss/eviction counters, the estimated bytes held
+    and the current entry count.
+    """
+    with _lock:
+        return dict(_stats, entries=len(_documents))
+
+
+def format_json_cache_stats() -> str:
+    """
+    Render the counters as a short log-friendly string.
+    """
+    stats = get_json_cache_stats()
+    lookups = stats["hits"] + stats["misses"]
+    rate = (100.0 * stats["hits"] / lookups) if lookups else 0.0
+    return (
+        f"hits={stats['hits']} misses={stats['misses']} ({rate:.1f}% hit rate), "
+        f"evictions={stats['evictions']}, entries={stats['entries']}, {stats['bytes'] / 1e6:.1f} MB"
+    )
+
+
+def clear_json_cache() -> None:
+    with _lock:
+        _documents.clear()
+        _stats["bytes"] = 0
+
+
+def parse_json(json_string: str) -> Any:
+    """
+    Parse a JSON document, sharing the result between every caller passing the same string.
+    Documents are keyed by the string itself (Python caches a string's hash, and the node
+    passing one output to many inputs hands each the same object), so a hit costs no rehash.
+    Objects and arrays come back as read-only FrozenDict / FrozenList; raises like json.loads.
+    """
+    if not isinstance(json_string, str):
+        raise TypeError(f"JSON input must be a string, not {type(json_string).__name__}")
+
+    with _lock:
+        entry = _documents.get(json_string)
+        if entry is not None:
+            _documents.move_to_end(json_string)
+            _stats["hits"] += 1
+            return entry[0]
+
+    # Parse outside the lock, freezing while decoding; a concurrent miss on the same document just
+    # parses it twice
+    value = json.loads(json_string, object_pairs_hook=_frozen_object)
+    if type(value) is list:
+        value = _freeze_list(value)
+    size = sys.getsizeof(json_string) * (1 + PARSED_SIZE_FACTOR)
+
+    with _lock:
+        _stats["misses"] += 1
+        if size > JSON_CACHE_MAX_BYTES or json_string in _documents:
+            return value
+        _documents[json_string] = (value, size)
+        _stats["bytes"] += size
+        while _stats["bytes"] > JSON_CACHE_MAX_BYTES:
+            _, (_, evicted) = _documents.popitem(last=False)
+            _stats["bytes"] -= evicted
+            _stats["evictions"] += 1
+    return value
@@ -0,0 +1,359 @@
+import hashlib
+from array import array
+import json
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+from json.decoder import scanstring
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Bumped when the index layout changes, so older index files are rebuilt
+INDEX_VERSION = 2
+
+# Files that hold one JSON document per line; anything else is read as a single JSON array/object
+LINE_EXTENSIONS = (".jsonl", ".ndjson")
+
+# Opened files (memory maps plus their index) kept in memory; least recently used ones are dropped
+# beyond this
+JSON_FILE_CACHE_SIZE = 8
+
+# Bytes scanned per step: line breaks of a JSON Lines file, text windows of a JSON document
+SCAN_CHUNK_BYTES = 64 * 1024 * 1024
+
+_WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+_DELIMITERS = " \t\n\r,:]}"
+_BLANK_BYTES = np.frombuffer(b" \t\r\n", np.uint8)
+_decoder = json.JSONDecoder()
+
+_files: "OrderedDict[Tuple[str, str], JsonRecordFile]" = OrderedDict()
+_stats = {"hits": 0, "opens": 0, "index_loads": 0, "index_builds": 0, "evictions": 0}
+_lock = threading.Lock()
+
+
+def get_json_file_stats() -> dict:
+    """
+    Return a snapshot of the process-wide counters: cache hits, file opens, index files loaded or
+    rebuilt, evictions, and the current entry count.
+    """
+    with _lock:
+        return dict(_stats, entries=len(_files))
+
+
+def format_json_file_stats() -> str:
+    """
+    Render the counters as a short log-friendly string.
+    """
+    stats = get_json_file_stats()
+    return (
+        f"hits={stats['hits']} opens={stats['opens']} (index loaded={stats['index_loads']}, "
+        f"built={stats['index_builds']}), evictions={stats['evictions']}, entries={stats['entries']}"
+    )
+
+
+def index_path(path: str, key_field: str = "") -> str:
+    """
+    Where the offset index of `path` is persisted: a hidden file next to it, one per key field.
+    """
+    directory, name = os.path.split(path)
+    if key_field:
+        name = f"{name}.{hashlib.sha1(key_field.encode('utf-8')).hexdigest()[:8]}"
+    return os.path.join(directory, f".{name}.index.npz")
+
+
+def _key_text(value) -> Optional[str]:
+    if isinstance(value, str):
+        return value
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    return json.dumps(value)
+
+
+def _line_spans(data: mmap.mmap, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The byte spans of the non-blank lines, found chunk by chunk without decoding the file.
+    """
+    breaks = []
+    for offset in range(0, size, SCAN_CHUNK_BYTES):
+        chunk = np.frombuffer(data, np.uint8, min(SCAN_CHUNK_BYTES, size - offset), offset)
+        breaks.append(np.flatnonzero(chunk == 10) + offset)
+    breaks = np.concatenate(breaks) if breaks else np.zeros(0, dtype=np.int64)
+    starts = np.concatenate(([0], breaks + 1)).astype(np.int64)
+    ends = np.concatenate((breaks, [size])).astype(np.int64)
+
+    keep = ends > starts
+    # A line starting with whitespace may be blank; those (rare) lines are checked one by one
+    leading = np.zeros(len(starts), dtype=bool)
+    leading[keep] = np.isin(np.frombuffer(data, np.uint8)[starts[keep]], _BLANK_BYTES)
+    for i in np.flatnonzero(leading):
+        keep[i] = bool(data[starts[i]:ends[i]].strip())
+    return starts[keep], ends[keep]
+
+
+class _Scanner:
+    """
+    Reads a memory-mapped JSON document through latin-1 text windows of SCAN_CHUNK_BYTES, so only
+    one window (or, for an item larger than that, the item) is in memory at a time. Latin-1 maps
+    every byte to one character, so window positions are byte offsets (every JSON delimiter is
+    ASCII, and UTF-8 multi-byte sequences never contain one).
+    """
+    def __init__(self, data: mmap.mmap, size: int):
+        self.data = data
+        self.size = size
+        self.base = 0
+        self.text = ""
+
+    def _load(self, position: int, length: int) -> None:
+        self.base = position
+        self.text = self.data[position:min(self.size, position + length)].decode("latin-1")
+
+    def _covers(self, position: int) -> bool:
+        return 0 <= position - self.base < len(self.text)
+
+    def _at_end(self) -> bool:
+        return self.base + len(self.text) >= self.size
+
+    def skip_whitespace(self, position: int) -> int:
+        while position < self.size:
+            if not self._covers(position):
+                self._load(position, SCAN_CHUNK_BYTES)
+            end = _WHITESPACE_RE.match(self.text, position - self.base).end()
+            position = self.base + end
+            if end < len(self.text):
+                break
+        return position
+
+    def char(self, position: int) -> str:
+        """
+        The character at `position`, or "" past the end.
+        """
+        if position >= self.size:
+            return ""
+        if not self._covers(position):
+            self._load(position, SCAN_CHUNK_BYTES)
+        return self.text[position - self.base]
+
+    def decode(self, position: int, decode: Callable[[str, int], Tuple[object, int]]) -> Tuple[object, int]:
+        """
+        Run `decode(text, index)` on the item at `position`; returns its value and absolute end.
+        An item that may run past the window is retried from its start with a window twice as long.
+        """
+        length = SCAN_CHUNK_BYTES
+        if not self._covers(position):
+            self._load(position, length)
+        while True:
+            try:
+                value, end = decode(self.text, position - self.base)
+                # A number cut off by the window edge can still decode ("1.5e-7" as "1.5"), so the
+                # item only counts as complete when a delimiter or whitespace follows it
+                if self._at_end() or (end < len(self.text) and self.text[end] in _DELIMITERS):
+                    return value, self.base + end
+            except ValueError:
+                if self._at_end():
+                    raise
+            if self.base == position:
+                length *= 2
+            self._load(position, length)
+
+
+def _document_spans(data: mmap.mmap, size: int, path: str) -> Tuple[str, np.ndarray, np.ndarray, list]:
+    """
+    The byte spans of the items of a top-level JSON array, or of the values of a top-level object
+    plus its keys. Each item is decoded once to find where it ends.
+    """
+    scanner = _Scanner(data, size)
+    position = scanner.skip_whitespace(0)
+    if scanner.char(position) not in ("[", "{"):
+        raise ValueError(f"{path} is not a JSON array or object")
+    kind = "array" if scanner.char(position) == "[" else "object"
+    closing = "]" if kind == "array" else "}"
+
+    starts, ends, keys = array("q"), array("q"), []
+    position = scanner.skip_whitespace(position + 1)
+    if scanner.char(position) == closing:
+        return kind, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), keys
+    try:
+        while True:
+            if kind == "object":
+                if scanner.char(position) != '"':
+                    raise ValueError("expected a key")
+                key, end = scanner.decode(position, lambda text, index: scanstring(text, index + 1))
+                if not key.isascii():
+                    key = json.loads(data[position:end])
+                keys.append(key)
+                position = scanner.skip_whitespace(end)
+                if scanner.char(position) != ":":
+                    raise ValueError("expected ':'")
+                position = scanner.skip_whitespace(position + 1)
+            _, end = scanner.decode(position, _decoder.raw_decode)
+            starts.append(position)
+            ends.append(end)
+            position = scanner.skip_whitespace(end)
+            if scanner.char(position) == ",":
+                position = scanner.skip_whitespace(position + 1)
+            elif scanner.char(position) == closing:
+                break
+            else:
+                raise ValueError(f"expected ',' or '{closing}'")
+    except ValueError as e:
+        # Decoder messages locate errors within the window; the byte offset here is the file's
+        raise ValueError(f"Invalid JSON in {path} at byte {position}: {getattr(e, 'msg', e)}")
+    if scanner.skip_whitespace(position + 1) != size:
+        raise ValueError(f"Invalid JSON in {path}: extra data after byte {position}")
+    return kind, np.frombuffer(starts, dtype=np.int64), np.frombuffer(ends, dtype=np.int64), keys
+
+
+class JsonRecordFile:
+    """
+    A JSON Lines file (one record per line) or a JSON array/object file (one record per item),
+    memory-mapped and indexed by the byte span of every record. A record is read by decoding only
+    its own bytes; records are addressed by position or, by key, by a field of each record (or an
+    object's own keys).
+
+    The index is persisted next to the file and only rebuilt when the file's size or mtime changes.
+    """
+    def __init__(self, path: str, key_field: str = ""):
+        self.path = path
+        self.key_field = key_field
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        with open(path, "rb") as handle:
+            self._data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self._key_rows: Optional[Dict[str, int]] = None
+        if not self._load_index():
+            self._build_index()
+            self._save_index()
+
+    def is_current(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == (self.size, self.mtime_ns)
+
+    def _load_index(self) -> bool:
+        try:
+            with np.load(index_path(self.path, self.key_field), allow_pickle=False) as stored:
+                if (
+                    int(stored["version"]) != INDEX_VERSION or int(stored["size"]) != self.size
+                    or int(stored["mtime_ns"]) != self.mtime_ns or str(stored["key_field"]) != self.key_field
+                ):
+                    return False
+                self.kind = str(stored["kind"])
+                self.starts = stored["starts"]
+                self.ends = stored["ends"]
+                self.key_blob = stored["key_blob"]
+                self.key_offsets = stored["key_offsets"]
+                self.key_rows = stored["key_rows"]
+        except (OSError, ValueError, KeyError):
+            return False
+        with _lock:
+            _stats["index_loads"] += 1
+        return True
+
+    def _build_index(self) -> None:
+        keys, rows = [], []
+        if self.path.lower().endswith(LINE_EXTENSIONS):
+            self.kind = "lines"
+            self.starts, self.ends = _line_spans(self._data, self.size)
+            if self.key_field:
+                for row in range(len(self.starts)):
+                    record = json.loads(self._data[self.starts[row]:self.ends[row]])
+                    key = _key_text(record.get(self.key_field)) if isinstance(record, dict) else None
+                    if key is not None:
+                        keys.append(key)
+                        rows.append(row)
+        elif self.size:
+            self.kind, self.starts, self.ends, keys = _document_spans(self._data, self.size, self.path)
+            if self.kind == "object":
+                rows = list(range(len(keys)))
+            elif self.key_field:
+                for row in range(len(self.starts)):
+                    record = json.loads(self._data[self.starts[row]:self.ends[row]])
+                    key = _key_text(record.get(self.key_field)) if isinstance(record, dict) else None
+                    if key is not None:
+                        keys.append(key)
+                        rows.append(row)
+        else:
+            raise ValueError(f"{self.path} is empty")
+        self._store_keys(keys)
+        self.key_rows = np.array(rows, dtype=np.int64)
+        with _lock:
+            _stats["index_builds"] += 1
+
+    def _store_keys(self, keys: List[str]) -> None:
+        # Keys are kept as one UTF-8 blob plus offsets, so each takes only its own length
+        encoded = [key.encode("utf-8") for key in keys]
+        self.key_blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        self.key_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(key) for key in encoded], out=self.key_offsets[1:])
+
+    def _save_index(self) -> None:
+        target = index_path(self.path, self.key_field)
+        tmp = f"{target}.tmp{threading.get_ident()}"
+        try:
+            with open(tmp, "wb") as handle:
+                np.savez(
+                    handle, version=INDEX_VERSION, size=self.size, mtime_ns=self.mtime_ns,
+                    key_field=self.key_field, kind=self.kind, starts=self.starts, ends=self.ends,
+                    key_blob=self.key_blob, key_offsets=self.key_offsets, key_rows=self.key_rows,
+                )
+            os.replace(tmp, target)
+        except OSError:
+            # A read-only directory just keeps the index in memory
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def record(self, index: int) -> str:
+        """
+        Return the JSON text of the record at `index` (negative counts from the end).
+        Raises IndexError when out of range.
+        """
+        if not -len(self.starts) <= index < len(self.starts):
+            raise IndexError(f"Record {index} out of range, {self.path} has {len(self.starts)}")
+        return self._data[self.starts[index]:self.ends[index]].decode("utf-8").strip()
+
+    def find(self, key: str) -> Optional[int]:
+        """
+        Return the position of the first record with the given key, or None.
+        """
+        if self._key_rows is None:
+            # Built on the first lookup. A repeated key finds its first record, except in an object,
+            # where (as when parsing it) the last one wins
+            blob = self.key_blob.tobytes()
+            offsets = self.key_offsets.tolist()
+            keys = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+            pairs = zip(keys, self.key_rows.tolist())
+            self._key_rows = dict(pairs if self.kind == "object" else reversed(list(pairs)))
+        return self._key_rows.get(key)
+
+
+def get_json_file(path: str, key_field: str = "") -> JsonRecordFile:
+    """
+    Return the indexed file at `path`, from an LRU of open files. A file whose size or mtime
+    changed since it was opened is re-opened (and its index rebuilt).
+    """
+    cache_key = (os.path.realpath(path), key_field)
+    with _lock:
+        cached = _files.get(cache_key)
+        if cached is not None and cached.is_current():
+            _files.move_to_end(cache_key)
+            _stats["hits"] += 1
+            return cached
+
+    opened = JsonRecordFile(cache_key[0], key_field)
+    with _lock:
+        _stats["opens"] += 1
+        _files[cache_key] = opened
+        _files.move_to_end(cache_key)
+        while len(_files) > JSON_FILE_CACHE_SIZE:
+            _files.popitem(last=False)
+            _stats["evictions"] += 1
+    return opened
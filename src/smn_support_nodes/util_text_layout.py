@@ -0,0 +1,155 @@
+import math
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+from .util_font_cache import get_font
+from .util_glyph_atlas import get_glyph_atlas
+
+
+class LineMetrics(NamedTuple):
+    width: float  # advance width, as ImageDraw.textlength
+    left: int  # horizontal ink extent relative to the line origin
+    top: int  # vertical extent, as ImageDraw.textbbox at (0, 0)
+    right: int
+    bottom: int
+
+
+class TextLine(NamedTuple):
+    text: str
+    x: int  # origin relative to the block's, after alignment (whole pixels)
+    y: int
+    metrics: LineMetrics
+
+
+class TextBlock(NamedTuple):
+    size: int
+    lines: Tuple[TextLine, ...]
+    width: float  # widest line
+    height: int  # first line's ink top to last line's ink bottom; a single line's textbbox height
+    ink_box: Optional[Tuple[int, int, int, int]]  # (x0, y0, x1, y1) relative to the origin, None if blank
+
+
+@lru_cache(maxsize=8192)
+def measure_line(path: Optional[str], size: int, text: str) -> LineMetrics:
+    """
+    Measure one line of text from the font's cached glyphs and kerning, without rendering it.
+    Memoized per (font, size, text).
+    """
+    if not text:
+        return LineMetrics(0.0, 0, 0, 0, 0)
+    layout = get_glyph_atlas(path, size).layout(text)
+    left, _, right, _ = layout.ink_box if layout.ink_box is not None else (0, 0, 0, 0)
+    return LineMetrics(layout.width, left, layout.top, right, layout.top + layout.height)
+
+
+@lru_cache(maxsize=256)
+def line_height(path: Optional[str], size: int) -> int:
+    """
+    The font's ascent plus descent: the distance between lines at a line spacing of 1.
+    """
+    ascent, descent = get_font(path, size).getmetrics()
+    return ascent + descent
+
+
+def _break_word(path: Optional[str], size: int, word: str, max_width: int) -> Tuple[str, str]:
+    """
+    Split a word too wide for a line into the longest prefix that fits (at least one character)
+    and the rest.
+    """
+    low, high = 1, len(word)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if measure_line(path, size, word[:mid]).width <= max_width:
+            low = mid
+        else:
+            high = mid - 1
+    return word[:low], word[low:]
+
+
+@lru_cache(maxsize=4096)
+def wrap_lines(path: Optional[str], size: int, text: str, max_width: int = 0) -> Tuple[str, ...]:
+    """
+    Split text into lines at line breaks and, with a positive `max_width`, greedily wrap each
+    paragraph at spaces so its lines fit. Words wider than a line are broken between characters.
+    """
+    lines = []
+    for paragraph in text.split("\n"):
+        if max_width <= 0:
+            lines.append(paragraph)
+            continue
+        current = None
+        for word in paragraph.split(" "):
+            candidate = word if current is None else f"{current} {word}"
+            if measure_line(path, size, candidate).width <= max_width:
+                current = candidate
+                continue
+            if current is not None:
+                lines.append(current)
+            current = word
+            while len(current) > 1 and measure_line(path, size, current).width > max_width:
+                head, current = _break_word(path, size, current, max_width)
+                lines.append(head)
+        lines.append(current if current is not None else "")
+    return tuple(lines)
+
+
+@lru_cache(maxsize=4096)
+def layout_text(
+    path: Optional[str], size: int, text: str, max_width: int = 0, line_spacing: float = 1.0,
+    align: str = "left"
+) -> TextBlock:
+    """
+    Lay out possibly multi-line text: wrapped to `max_width` (0 to only break at line breaks),
+    lines `line_spacing` line heights apart, each aligned "left", "center" or "right" within the
+    widest line. Memoized, and built from memoized line measurements.
+    """
+    lines = wrap_lines(path, size, text, max_width)
+    metrics = [measure_line(path, size, line) for line in lines]
+    advance = int(round(line_height(path, size) * line_spacing))
+    width = max(m.width for m in metrics)
+
+    placed = []
+    x0 = y0 = x1 = y1 = None
+    for i, (line, m) in enumerate(zip(lines, metrics)):
+        # Whole-pixel offsets (halves down) keep every line a plain translation of its rendering
+        offset = (width - m.width) / 2 if align == "center" else (width - m.width) if align == "right" else 0
+        x = math.ceil(offset - 0.5)
+        y = i * advance
+        placed.append(TextLine(line, x, y, m))
+        if m.right <= m.left or m.bottom <= m.top:
+            continue
+        lx0, ly0 = x + m.left, y + m.top
+        lx1, ly1 = x + m.right, y + m.bottom
+        x0 = lx0 if x0 is None else min(x0, lx0)
+        y0 = ly0 if y0 is None else min(y0, ly0)
+        x1 = lx1 if x1 is None else max(x1, lx1)
+        y1 = ly1 if y1 is None else max(y1, ly1)
+
+    height = (len(lines) - 1) * advance + metrics[-1].bottom - metrics[0].top
+    return TextBlock(size, tuple(placed), width, height, None if x0 is None else (x0, y0, x1, y1))
+
+
+@lru_cache(maxsize=1024)
+def fit_text_size(
+    path: Optional[str], text: str, max_width: int, max_height: int, max_size: int, min_size: int = 1,
+    line_spacing: float = 1.0, wrap: bool = True
+) -> int:
+    """
+    Find the largest size in [min_size, max_size] at which the laid out text fits a
+    `max_width` × `max_height` box (0 leaves that side unbounded), wrapping to the width when `wrap`.
+    Binary-searches sizes using only cached measurements; returns min_size when nothing fits.
+    """
+    def fits(size):
+        block = layout_text(path, size, text, max_width if wrap else 0, line_spacing)
+        return (max_width <= 0 or block.width <= max_width) and (max_height <= 0 or block.height <= max_height)
+
+    low, high = min_size, max_size
+    if high < low or not fits(low):
+        return min_size
+    while low < high:
+        mid = (low + high + 1) // 2
+        if fits(mid):
+            low = mid
+        else:
+            high = mid - 1
+    return low
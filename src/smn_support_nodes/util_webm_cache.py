@@ -0,0 +1,154 @@
+import hashlib
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import torch  # type: ignore
+
+# Frames hashed per task when fingerprinting; tasks run in parallel (hashlib releases the GIL)
+FINGERPRINT_CHUNK_FRAMES = 16
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_stats_lock = threading.Lock()
+_cache_lock = threading.Lock()
+
+
+def _bump(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def get_cache_stats() -> dict:
+    """
+    Return a snapshot of the process-wide hit/miss/store/eviction counters.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def format_cache_stats() -> str:
+    """
+    Render the counters as a short log-friendly string.
+    """
+    stats = get_cache_stats()
+    lookups = stats["hits"] + stats["misses"]
+    rate = (100.0 * stats["hits"] / lookups) if lookups else 0.0
+    return (
+        f"hits={stats['hits']} misses={stats['misses']} ({rate:.1f}% hit rate), "
+        f"stores={stats['stores']} evictions={stats['evictions']}"
+    )
+
+
+def _hash_chunk(chunk: torch.Tensor) -> bytes:
+    data = chunk.detach().cpu().contiguous()
+    return hashlib.blake2b(data.view(torch.uint8).numpy(), digest_size=20).digest()
+
+
+def fingerprint_frames(images: torch.Tensor, settings: dict) -> str:
+    """
+    Return a hex key for `images` plus the encode `settings` that affect the output file.
+    Frame data is hashed in parallel chunks and the chunk digests are folded in order.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr(sorted(settings.items())).encode("utf-8"))
+    digest.update(f"{tuple(images.shape)}|{images.dtype}".encode("utf-8"))
+
+    chunks = [
+        images[start:start + FINGERPRINT_CHUNK_FRAMES]
+        for start in range(0, images.shape[0], FINGERPRINT_CHUNK_FRAMES)
+    ]
+    workers = max(1, min(len(chunks), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for chunk_digest in pool.map(_hash_chunk, chunks):
+            digest.update(chunk_digest)
+
+    return digest.hexdigest()
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """
+    Hard-link `src` to `dst`, falling back to a copy across filesystems.
+    `dst` is written via a temporary name so readers never see a partial file.
+    """
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return
+    tmp = f"{dst}.tmp{threading.get_ident()}"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+def cache_lookup(cache_dir: str, key: str, dest: str) -> bool:
+    """
+    If an entry for `key` exists, place it at `dest`, mark it recently used and return True.
+    """
+    entry = os.path.join(cache_dir, f"{key}.webm")
+    with _cache_lock:
+        if not os.path.isfile(entry):
+            _bump("misses")
+            return False
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        _link_or_copy(entry, dest)
+        # mtime doubles as the LRU timestamp
+        os.utime(entry)
+    _bump("hits")
+    return True
+
+
+def cache_store(cache_dir: str, key: str, src: str, max_bytes: int) -> List[str]:
+    """
+    Add `src` as the entry for `key`, then evict least recently used entries until the
+    cache fits in `max_bytes`. Returns the evicted file names.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    with _cache_lock:
+        _link_or_copy(src, os.path.join(cache_dir, f"{key}.webm"))
+        evicted = _evict(cache_dir, max_bytes)
+    _bump("stores")
+    _bump("evictions", len(evicted))
+    return evicted
+
+
+def _evict(cache_dir: str, max_bytes: int) -> List[str]:
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".webm"):
+            continue
+        try:
+            st = os.stat(os.path.join(cache_dir, name))
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, name))
+
+    total = sum(size for _, size, _ in entries)
+    evicted: List[str] = []
+    # Oldest first; the newest entry is always kept even if it alone exceeds the budget
+    for _, size, name in sorted(entries)[:-1]:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            continue
+        total -= size
+        evicted.append(name)
+    return evicted
+
+
+def remove_stale_output(path: str) -> Optional[str]:
+    """
+    Unlink an existing output file before re-encoding. The file may be a hard link into
+    the cache, and ffmpeg would otherwise truncate and overwrite the cached entry in place.
+    Returns an error message on failure.
+    """
+    if not os.path.lexists(path):
+        return None
+    try:
+        os.remove(path)
+    except OSError as e:
+        return str(e)
+    return None
@@ -0,0 +1,72 @@
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+import torch
+
+_NODE_FILE = os.path.join(
+    os.path.dirname(__file__), os.pardir, "src", "smn_support_nodes", "nodes_prep", "node_prep_flattenalpha.py"
+)
+_spec = importlib.util.spec_from_file_location("node_prep_flattenalpha", _NODE_FILE)
+_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_module)
+SsnPrepFlattenAlpha = _module.SsnPrepFlattenAlpha
+
+
+def flatten_uint8(images: torch.Tensor, bg_rgb) -> torch.Tensor:
+    """
+    The previous implementation: quantize to uint8, composite per frame on the host, back to float.
+    """
+    batch_np = images.clamp(0, 1).mul(255).to(torch.uint8).numpy()
+    result_np = np.empty(batch_np.shape[:3] + (3, ), dtype=np.uint8)
+    for b in range(batch_np.shape[0]):
+        rgb = batch_np[b, :, :, :3].astype(np.float32)
+        alpha = batch_np[b, :, :, 3:4].astype(np.float32) / 255.0
+        bg = np.ones_like(rgb) * np.array(bg_rgb, dtype=np.float32)
+        result_np[b] = np.clip(rgb * alpha + bg * (1 - alpha), 0, 255)
+    return torch.from_numpy(result_np).float() / 255.0
+
+
+@pytest.mark.parametrize("background_color, bg_rgb", [("#000000", (0, 0, 0)), ("#ff8020", (255, 128, 32))])
+def test_matches_uint8_path_on_8bit_input(background_color, bg_rgb):
+    generator = torch.Generator().manual_seed(0)
+    images = torch.randint(0, 256, (3, 17, 23, 4), generator=generator).float() / 255.0
+
+    (result, ) = SsnPrepFlattenAlpha().execute(images, background_color)
+
+    assert result.shape == (3, 17, 23, 3)
+    assert result.dtype == images.dtype
+    # The old path truncated to uint8, so it is up to one step below
+    assert (result - flatten_uint8(images, bg_rgb)).abs().max().item() <= 1.0 / 255 + 1e-6
+
+
+def test_matches_uint8_path_on_float_input():
+    generator = torch.Generator().manual_seed(1)
+    images = torch.rand((2, 9, 11, 4), generator=generator)
+
+    (result, ) = SsnPrepFlattenAlpha().execute(images, "#3366cc")
+
+    # The old path also quantized color and alpha before compositing
+    assert (result - flatten_uint8(images, (0x33, 0x66, 0xcc))).abs().max().item() <= 2.5 / 255
+
+
+def test_input_is_left_untouched():
+    images = torch.rand((2, 5, 7, 4), generator=torch.Generator().manual_seed(2))
+    original = images.clone()
+
+    (result, ) = SsnPrepFlattenAlpha().execute(images, "#ffffff")
+
+    assert torch.equal(images, original)
+    assert result.data_ptr() != images.data_ptr()
+
+
+def test_accepts_stride_zero_views():
+    # A repeated frame, as SsnPrepSelectBatch returns it, shares one frame's memory
+    frame = torch.rand((1, 5, 7, 4), generator=torch.Generator().manual_seed(3))
+    images = frame.expand(3, -1, -1, -1)
+
+    (result, ) = SsnPrepFlattenAlpha().execute(images, "#102030")
+    (single, ) = SsnPrepFlattenAlpha().execute(frame, "#102030")
+
+    assert torch.equal(result, single.expand(3, -1, -1, -1))